@@ -150,7 +150,7 @@ class AgenteReclamos(BaseAgent):
             (datetime.utcnow() - start_time).total_seconds() * 1000
         )
 
-        audit_log = await self.audit_tool.execute(
+        audit_log = self.audit_tool.record(
             action="classify_and_route",
             entity_id=claim_id,
             decision={
@@ -262,7 +262,11 @@ LLM_CONFIG = {
     "classifier": {
         "model_name": "gemini-2.0-flash",
         "temperature": 0.3,  # Baja para clasificación consistente
-        "max_tokens": 1000
+        # El JSON ocupa < 150 tokens, pero el provider usa su modelo por
+        # defecto (gemini-2.5-flash, con thinking) y los tokens de
+        # razonamiento también cuentan contra max_output_tokens
+        "max_tokens": 1000,
+        "response_format": "json"  # JSON mode si el provider lo soporta
     }
 }
 
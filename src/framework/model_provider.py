@@ -14,6 +14,7 @@ Mantenemos esto SIMPLE:
 
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
+from functools import cached_property
 import os
 
 
@@ -68,7 +69,8 @@ class ModelProvider(ABC):
         self,
         prompt: str,
         temperature: float = 0.7,
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        response_format: Optional[str] = None
     ) -> str:
         """
         Genera texto con el LLM.
@@ -77,6 +79,8 @@ class ModelProvider(ABC):
             prompt: Prompt para el modelo
             temperature: Creatividad (0.0 = determinista, 1.0 = creativo)
             max_tokens: Máximo de tokens a generar
+            response_format: "json" para pedir JSON mode / structured output
+                si el provider lo soporta (None = texto libre)
 
         Returns:
             Texto generado por el modelo
@@ -147,11 +151,31 @@ class VertexAIProvider(ModelProvider):
                 "Ejecuta: pip install google-cloud-aiplatform"
             )
 
+    @cached_property
+    def _generative_model(self):
+        """
+        Modelo Gemini, creado una sola vez por provider.
+
+        PEDAGOGÍA:
+        - Antes se creaba un GenerativeModel en cada generate(): reutilizarlo
+          permite que el SDK reutilice su cliente y conexiones (keep-alive)
+        - Todas las tools que comparten este provider comparten el modelo
+        """
+        from vertexai.generative_models import GenerativeModel
+        return GenerativeModel(self.model_name)
+
+    @cached_property
+    def _embedding_model(self):
+        """Modelo de embeddings (text-embedding-004), cargado una sola vez."""
+        from vertexai.language_models import TextEmbeddingModel
+        return TextEmbeddingModel.from_pretrained("text-embedding-004")
+
     async def generate(
         self,
         prompt: str,
         temperature: float = 0.7,
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        response_format: Optional[str] = None
     ) -> Any:
         """
         Genera texto con Gemini.
@@ -159,23 +183,29 @@ class VertexAIProvider(ModelProvider):
         Si hay tools registradas y el LLM decide usar una,
         ejecuta la tool y retorna su resultado directamente.
 
+        response_format="json" usa response_mime_type="application/json"
+        (JSON mode de Gemini). Gemini no lo admite junto con function
+        calling, así que se ignora si hay tools registradas.
+
         Returns:
             - str: Si no hay tools o el LLM responde con texto
             - Any: Resultado de tool.execute() si el LLM usa una tool
         """
         try:
             from vertexai.generative_models import (
-                GenerativeModel,
                 GenerationConfig,
                 Tool as GeminiTool,
                 FunctionDeclaration
             )
 
-            model = GenerativeModel(self.model_name)
-            config = GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens
-            )
+            model = self._generative_model
+            config_kwargs = {
+                "temperature": temperature,
+                "max_output_tokens": max_tokens
+            }
+            if response_format == "json" and not self._registered_tools:
+                config_kwargs["response_mime_type"] = "application/json"
+            config = GenerationConfig(**config_kwargs)
 
             # Si hay tools registradas, usar function calling
             if self._registered_tools:
@@ -263,10 +293,8 @@ class VertexAIProvider(ModelProvider):
         - Compatible con pgvector
         """
         try:
-            from vertexai.language_models import TextEmbeddingModel
-
-            # Cargar modelo de embeddings
-            model = TextEmbeddingModel.from_pretrained("text-embedding-004")
+            # Modelo de embeddings (cacheado en el provider)
+            model = self._embedding_model
 
             # Generar embedding
             embeddings = model.get_embeddings([text])
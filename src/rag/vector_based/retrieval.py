@@ -4,12 +4,26 @@ Retrieval orquestado para Vector RAG
 Integra ingestion, embeddings y vector store para búsqueda completa.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, TypedDict
 from .ingestion import DocumentIngestion
 from .embeddings import EmbeddingGenerator
 from .vector_store import VectorStore
 
 
+class RetrievedChunk(TypedDict):
+    """Chunk recuperado con su cita (es un dict)."""
+    content: str
+    metadata: Dict[str, Any]
+    score: float
+    citation: str
+
+
+class RetrievalResult(TypedDict):
+    """Resultado de VectorRetrieval.retrieve (es un dict)."""
+    chunks: List[RetrievedChunk]
+    method: str
+
+
 class VectorRetrieval:
     """
     Orquestador del flujo completo de Vector RAG.
@@ -97,7 +111,7 @@ class VectorRetrieval:
         query: str,
         k: int = 5,
         filter_metadata: Dict[str, Any] | None = None
-    ) -> Dict[str, Any]:
+    ) -> RetrievalResult:
         """
         Recupera chunks relevantes para una query.
 
@@ -130,26 +144,51 @@ class VectorRetrieval:
         )
 
         # 3. Formatear con citas
-        formatted_chunks = []
-        for chunk in chunks:
-            metadata = chunk["metadata"]
-            score = chunk["score"]
-
-            # Formatear citación
-            citation = self._format_citation(metadata, score)
-
-            formatted_chunks.append({
-                "content": chunk["content"],
-                "metadata": metadata,
-                "score": score,
-                "citation": citation
-            })
+        formatted_chunks = [self._format_chunk(chunk) for chunk in chunks]
 
         return {
             "chunks": formatted_chunks,
             "method": "vector_rag"
         }
 
+    async def retrieve_stream(
+        self,
+        query: str,
+        k: int = 5,
+        filter_metadata: Dict[str, Any] | None = None
+    ) -> AsyncIterator[RetrievedChunk]:
+        """
+        Igual que retrieve, pero entrega los chunks formateados uno a uno.
+
+        PEDAGOGÍA:
+        - Async generator: el consumidor procesa cada chunk apenas está listo
+          en vez de esperar el dict completo
+        - El vector store retorna los top-k en una sola query (k es chico);
+          lo que se hace incremental es el formateo y el consumo aguas arriba
+        """
+        query_embedding = await self.embedding_generator.generate_embedding(query)
+
+        chunks = await self.vector_store.similarity_search(
+            query_embedding=query_embedding,
+            k=k,
+            filter_metadata=filter_metadata
+        )
+
+        for chunk in chunks:
+            yield self._format_chunk(chunk)
+
+    def _format_chunk(self, chunk: Dict[str, Any]) -> RetrievedChunk:
+        """Formatea un chunk del vector store agregando su cita."""
+        metadata = chunk["metadata"]
+        score = chunk["score"]
+
+        return {
+            "content": chunk["content"],
+            "metadata": metadata,
+            "score": score,
+            "citation": self._format_citation(metadata, score)
+        }
+
     def _format_citation(self, metadata: Dict[str, Any], score: float) -> str:
         """
         Formatea una cita a partir de metadata.
@@ -11,10 +11,15 @@ PEDAGOGÍA:
 - Separación de concerns: el agente decide, la tool registra
 """
 
-from typing import Any, Dict, Optional
-from datetime import datetime, timezone
-import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from functools import cached_property
+import asyncio
+import logging
+import os
+import threading
+import time
 import json
+import weakref
 import structlog
 
 from src.tools.checklist_tool import Tool, ToolDefinition
@@ -23,6 +28,66 @@ from src.tools.checklist_tool import Tool, ToolDefinition
 # Configurar logger estructurado
 logger = structlog.get_logger("audit")
 
+# Cola de auditoría: tamaño máximo y entries persistidos por lote
+AUDIT_QUEUE_MAXSIZE = 10_000
+AUDIT_BATCH_SIZE = 100
+
+# Lo que viaja por la cola: (campos del evento structlog, entry para el
+# archivo JSONL o None); el entry se serializa en el worker
+AuditRecord = Tuple[Dict[str, Any], Optional[Dict[str, Any]]]
+
+# Chequeo de nivel del logger de auditoría (ver _audit_info_enabled):
+# (config de structlog con la que se resolvió, método del logger)
+_info_level_check: Optional[Tuple[Tuple[Any, Any], Callable[[int], bool]]] = None
+
+
+def _audit_info_enabled() -> bool:
+    """
+    Indica si el logger de auditoría emite eventos de nivel INFO.
+
+    Usa is_enabled_for (filtering logger de structlog) o isEnabledFor
+    (integración con logging stdlib); si el logger configurado no expone
+    ninguno, asume que está habilitado.
+
+    El método se resuelve una vez por configuración de structlog y se
+    reutiliza: bind() arma un logger nuevo en cada llamada y es más caro
+    que el trabajo que este guard ahorra. Si la app reconfigura structlog
+    (otro wrapper_class o logger_factory), se vuelve a resolver.
+    """
+    global _info_level_check
+    config = structlog.get_config()
+    config_key = (config["wrapper_class"], config["logger_factory"])
+
+    if _info_level_check is None or _info_level_check[0] != config_key:
+        bound = logger.bind()
+        is_enabled_for = (
+            getattr(bound, "is_enabled_for", None)
+            or getattr(bound, "isEnabledFor", None)
+            or (lambda level: True)
+        )
+        _info_level_check = (config_key, is_enabled_for)
+
+    return _info_level_check[1](logging.INFO)
+
+
+def _format_iso_utc(ns: int) -> str:
+    """
+    Formatea un timestamp en nanosegundos como ISO 8601 UTC.
+
+    Equivalente a datetime.now(timezone.utc).isoformat() pero sin
+    construir objetos datetime/tzinfo en cada evento de auditoría. Como
+    isoformat(), omite la fracción cuando los microsegundos son cero.
+    """
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    micros = remainder // 1000
+    t = time.gmtime(seconds)
+    fraction = f".{micros:06d}" if micros else ""
+    return (
+        f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}"
+        f"T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
+        f"{fraction}+00:00"
+    )
+
 
 class AuditTool(Tool):
     """
@@ -41,6 +106,19 @@ class AuditTool(Tool):
     - Separado del agente: Single Responsibility Principle
     """
 
+    # Prefijo del ID (3 caracteres) -> tipo de entidad
+    _ENTITY_PREFIX = {"CLM": "claim", "USR": "user", "TRX": "transaction"}
+
+    # Reglas de sanitización
+    _SENSITIVE_KEYS = frozenset({"password", "token", "secret", "credit_card"})
+    _MAX_STR_LEN = 1000
+
+    # Tipos primitivos que se copian sin más inspección
+    _JSON_SAFE_TYPES = frozenset({int, float, bool, type(None), str})
+
+    # Reemplazo de un contenedor que se contiene a sí mismo (ciclo)
+    _CIRCULAR = "[CIRCULAR]"
+
     def __init__(
         self,
         log_to_file: bool = False,
@@ -61,12 +139,28 @@ class AuditTool(Tool):
         self.log_to_file = log_to_file
         self.log_file_path = log_file_path or "logs/audit.jsonl"
 
-    @property
+        # La persistencia (structlog + archivo) ocurre en un worker de fondo:
+        # execute() solo encola el entry y retorna de inmediato
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+        self._worker: Optional[asyncio.Task] = None
+
+        # _persist corre en un thread (worker) o en el thread del caller
+        # (sin loop, cola llena, cierre): el lock serializa las escrituras
+        self._persist_lock = threading.Lock()
+
+        # File descriptor del archivo JSONL (se abre en la primera escritura),
+        # la identidad (st_dev, st_ino) del archivo que tiene abierto y el
+        # finalizer que lo cierra si la instancia se descarta sin aclose()
+        self._fd: Optional[int] = None
+        self._fd_identity: Optional[Tuple[int, int]] = None
+        self._fd_finalizer: Optional[weakref.finalize] = None
+
+    @cached_property
     def definition(self) -> ToolDefinition:
         """
         Define la tool para el sistema.
         """
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="audit_log",
             description=(
                 "Registra una acción o decisión del agente para auditoría. "
@@ -102,6 +196,29 @@ class AuditTool(Tool):
         entity_id: str,
         decision: Dict[str, Any],
         metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Registra una decisión del agente (interfaz async de Tool).
+
+        PEDAGOGÍA:
+        - No hay I/O que esperar: delega en record(), que es síncrono
+        - El código que no necesita el contrato async (p.ej. el flujo fijo
+          de AgenteReclamos) puede llamar record() directamente y evitar
+          crear una corrutina por evento
+        """
+        return self.record(
+            action=action,
+            entity_id=entity_id,
+            decision=decision,
+            metadata=metadata
+        )
+
+    def record(
+        self,
+        action: str,
+        entity_id: str,
+        decision: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Registra una decisión del agente.
@@ -114,18 +231,32 @@ class AuditTool(Tool):
 
         Returns:
             Dict con el log entry creado:
-                - trace_id: UUID único para este log
+                - trace_id: ID único para este log (32 caracteres hex)
                 - timestamp: Momento del registro
-                - logged: True si se registró correctamente
+                - logged: True si se registró correctamente (False si
+                  el nivel INFO está filtrado y no se escribe a archivo)
 
         PEDAGOGÍA:
         - Genera trace_id único para correlacionar logs
         - Timestamp en UTC para consistencia
         - Retorna el log entry para incluir en response
+        - El I/O (structlog + archivo) sale del camino crítico: se encola
+          y lo persiste un worker de fondo (ver flush()); fuera de un
+          event loop se persiste en forma síncrona
         """
+        # Sin destino activo (INFO filtrado y sin archivo): no construir el entry
+        if not self.log_to_file and not _audit_info_enabled():
+            return {
+                "trace_id": None,
+                "timestamp": None,
+                "logged": False,
+                "action": action,
+                "entity_id": entity_id
+            }
+
         # Generar identificadores
-        trace_id = str(uuid.uuid4())
-        timestamp = datetime.now(timezone.utc).isoformat()
+        trace_id = os.urandom(16).hex()
+        timestamp = _format_iso_utc(time.time_ns())
 
         # Construir entry de auditoría
         audit_entry = {
@@ -143,12 +274,10 @@ class AuditTool(Tool):
             "metadata": metadata or {}
         }
 
-        # Registrar en structlog
-        self._log_entry(audit_entry)
-
-        # Opcionalmente escribir a archivo
-        if self.log_to_file:
-            self._write_to_file(audit_entry)
+        # Encolar para el worker de fondo una foto del entry (campos del
+        # evento + copia del entry): lo que el caller modifique después
+        # de record() no debe cambiar lo que queda auditado
+        self._enqueue(self._snapshot(audit_entry))
 
         # Retornar resumen para incluir en response
         return {
@@ -159,6 +288,171 @@ class AuditTool(Tool):
             "entity_id": entity_id
         }
 
+    def _snapshot(self, entry: Dict[str, Any]) -> AuditRecord:
+        """
+        Congela el entry en el momento de record().
+
+        PEDAGOGÍA:
+        - La decisión sanitizada ya es una copia propia (_sanitize_decision
+          copia dicts y listas)
+        - Con archivo: también se copia la metadata, así el JSONL refleja
+          el estado al registrar aunque el caller reutilice sus dicts/listas.
+          La serialización a JSON queda en el worker (_write_to_file), fuera
+          del camino crítico
+        - Sin archivo: el evento lleva classification/routing de la decisión
+          sanitizada
+        """
+        fields = {
+            "trace_id": entry["trace_id"],
+            "action": entry["action"],
+            "entity_id": entry["entity_id"],
+            "entity_type": entry["entity_type"],
+        }
+
+        if self.log_to_file:
+            entry["metadata"] = self._copy_tree(entry["metadata"], redact=False)
+            return fields, entry
+
+        decision = entry["decision"]
+        fields["classification"] = decision.get("classification")
+        fields["routing"] = decision.get("routing")
+        return fields, None
+
+    def _enqueue(self, record: AuditRecord) -> None:
+        """
+        Encola el registro para que lo persista el worker de fondo.
+
+        PEDAGOGÍA:
+        - put_nowait es O(1) y nunca bloquea al agente
+        - Backpressure: si la cola está llena, se persiste en forma
+          síncrona en vez de descartar el entry (compliance)
+        """
+        try:
+            self._ensure_worker()
+        except RuntimeError:
+            # Sin event loop corriendo (uso síncrono): persistir directo
+            self._persist([record])
+            return
+
+        # _ensure_worker ya dejó la cola ligada al loop actual
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self._persist([record])
+
+    def _ensure_worker(self) -> None:
+        """
+        Inicia el worker de fondo en forma lazy (primer execute).
+
+        Si el worker anterior terminó o pertenece a otro event loop (p.ej.
+        un asyncio.run() anterior cuyo loop se cerró sin cancelarlo), se
+        persiste lo que quedó en su cola y se crea una cola nueva ligada
+        al loop actual.
+        """
+        # RuntimeError si no hay event loop corriendo
+        loop = asyncio.get_running_loop()
+
+        if self._worker_is_live(loop):
+            return
+
+        if self._worker is not None:
+            self._persist_pending()
+            self._queue = asyncio.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+
+        self._worker = loop.create_task(self._drain())
+
+    def _worker_is_live(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """Indica si hay un worker corriendo en el event loop dado."""
+        return (
+            self._worker is not None
+            and not self._worker.done()
+            and self._worker.get_loop() is loop
+        )
+
+    async def _drain(self) -> None:
+        """
+        Worker de fondo: consume la cola y persiste en lotes.
+
+        PEDAGOGÍA:
+        - Espera el primer entry y luego toma hasta AUDIT_BATCH_SIZE
+          sin bloquear, para escribir el archivo una sola vez por lote
+        - El lote se persiste en un thread (asyncio.to_thread): json.dumps
+          y os.write no bloquean a las demás corrutinas del event loop
+        - Al cancelarse (cierre del event loop) persiste lo pendiente
+        """
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < AUDIT_BATCH_SIZE and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                try:
+                    await asyncio.to_thread(self._persist, batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        except asyncio.CancelledError:
+            self._persist_pending()
+            raise
+
+    def _take_pending(self) -> List[AuditRecord]:
+        """Saca de la cola (sin esperar) todo lo que quede en ella."""
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+            self._queue.task_done()
+        return batch
+
+    def _persist_pending(self) -> None:
+        """Persiste en forma síncrona todo lo que quede en la cola."""
+        batch = self._take_pending()
+        if batch:
+            self._persist(batch)
+
+    def _persist(self, records: List[AuditRecord]) -> None:
+        """
+        Registra un lote de entries en structlog y, opcionalmente, en archivo.
+
+        Puede correr en un thread del executor o en el thread del caller:
+        el lock mantiene un solo lote escribiendo a la vez.
+        """
+        with self._persist_lock:
+            try:
+                for fields, _ in records:
+                    self._log_entry(fields)
+
+                if self.log_to_file:
+                    self._write_to_file(records)
+            except Exception as e:
+                logger.error("audit_persist_failed", error=str(e), count=len(records))
+
+    async def flush(self) -> None:
+        """
+        Espera a que el worker persista todos los entries encolados.
+
+        PEDAGOGÍA:
+        - Llamar antes de leer el archivo de auditoría o al terminar
+          el proceso para no perder entries en vuelo
+        - Si el worker es de otro event loop (ya no avanza), lo pendiente
+          se persiste en forma síncrona en vez de esperarlo
+        """
+        if self._worker_is_live(asyncio.get_running_loop()):
+            await self._queue.join()
+        else:
+            self._persist_pending()
+
+    async def aclose(self) -> None:
+        """Persiste lo pendiente y detiene el worker de fondo."""
+        await self.flush()
+        if self._worker_is_live(asyncio.get_running_loop()):
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+        self._close_fd()
+
     def _infer_entity_type(self, entity_id: str) -> str:
         """
         Infiere el tipo de entidad basado en el ID.
@@ -167,14 +461,7 @@ class AuditTool(Tool):
         - Convención de naming: CLM-* = claim, USR-* = user, etc.
         - Útil para filtrar logs por tipo de entidad
         """
-        if entity_id.startswith("CLM"):
-            return "claim"
-        elif entity_id.startswith("USR"):
-            return "user"
-        elif entity_id.startswith("TRX"):
-            return "transaction"
-        else:
-            return "unknown"
+        return self._ENTITY_PREFIX.get(entity_id[:3], "unknown")
 
     def _sanitize_decision(self, decision: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -183,36 +470,85 @@ class AuditTool(Tool):
         PEDAGOGÍA:
         - Remover datos sensibles (PII, tokens, etc.)
         - Truncar campos muy largos
-        - Asegurar que sea serializable a JSON
+        - La serialización a JSON (con fallback a str) ocurre una sola
+          vez en _serialize, sin probar cada valor con json.dumps aquí
+        - Dicts y listas se copian: el resultado no comparte contenedores
+          con el caller (el entry se persiste después, en el worker)
         """
-        sanitized = {}
+        return self._copy_tree(decision, redact=True)
 
-        for key, value in decision.items():
-            # Saltar campos sensibles
-            if key in ["password", "token", "secret", "credit_card"]:
-                sanitized[key] = "[REDACTED]"
-                continue
+    def _copy_tree(self, root: Dict[str, Any], redact: bool) -> Dict[str, Any]:
+        """
+        Copia un dict anidado (dicts, listas y tuplas) en forma iterativa.
 
-            # Truncar strings muy largos
-            if isinstance(value, str) and len(value) > 1000:
-                sanitized[key] = value[:1000] + "...[TRUNCATED]"
-                continue
+        Args:
+            root: Dict a copiar
+            redact: Si True, redacta claves sensibles y trunca strings largos
 
-            # Recursivamente sanitizar dicts anidados
-            if isinstance(value, dict):
-                sanitized[key] = self._sanitize_decision(value)
-                continue
+        PEDAGOGÍA:
+        - Pila explícita de (items, destino, ancestros) en vez de recursión:
+          sin un frame de Python por nivel anidado
+        - ancestros: ids de los contenedores en el camino desde la raíz; un
+          contenedor que reaparece en su propio camino (ciclo) se corta con
+          [CIRCULAR] en vez de recorrerse una y otra vez. Un contenedor
+          compartido (sin ciclo) se copia normalmente
+        """
+        copied: Dict[str, Any] = {}
+        stack = [(root.items(), copied, frozenset((id(root),)))]
+
+        while stack:
+            items, target, ancestors = stack.pop()
+
+            # items: pares (key, value) de un dict o (índice, valor) de una
+            # lista; target[key] = ... sirve para ambos destinos
+            for key, value in items:
+                # Saltar campos sensibles
+                if redact and key in self._SENSITIVE_KEYS:
+                    target[key] = "[REDACTED]"
+                    continue
+
+                # type() exacto para el caso común (evita recorrer el MRO)
+                value_type = type(value)
+
+                # Truncar strings muy largos (incluye subclases: StrEnum, etc.)
+                if value_type is str or isinstance(value, str):
+                    if redact and len(value) > self._MAX_STR_LEN:
+                        value = value[:self._MAX_STR_LEN] + "...[TRUNCATED]"
+                    target[key] = value
+                    continue
+
+                # Otros primitivos: siempre serializables, se copian directo
+                if value_type in self._JSON_SAFE_TYPES:
+                    target[key] = value
+                    continue
+
+                is_dict = value_type is dict or isinstance(value, dict)
+                if is_dict or value_type is list or isinstance(value, (list, tuple)):
+                    if id(value) in ancestors:
+                        target[key] = self._CIRCULAR
+                        continue
+                    path = ancestors | {id(value)}
 
-            # Asegurar que sea serializable
-            try:
-                json.dumps(value)
-                sanitized[key] = value
-            except (TypeError, ValueError):
-                sanitized[key] = str(value)
+                    # Dicts anidados (incluye subclases): se procesan más adelante
+                    if is_dict:
+                        nested: Dict[str, Any] = {}
+                        target[key] = nested
+                        stack.append((value.items(), nested, path))
+                        continue
+
+                    # Listas y tuplas: lista nueva, elementos copiados igual
+                    nested_list: List[Any] = [None] * len(value)
+                    target[key] = nested_list
+                    stack.append((enumerate(value), nested_list, path))
+                    continue
 
-        return sanitized
+                # Resto (objetos): se copia tal cual; lo que no sea
+                # serializable se convierte a str al escribir (_serialize)
+                target[key] = value
 
-    def _log_entry(self, entry: Dict[str, Any]) -> None:
+        return copied
+
+    def _log_entry(self, fields: Dict[str, Any]) -> None:
         """
         Registra el entry usando structlog.
 
@@ -220,55 +556,113 @@ class AuditTool(Tool):
         - structlog produce JSON estructurado automáticamente
         - Incluye contexto (trace_id) para correlación
         - Nivel INFO para decisiones normales
+        - Se pasan campos estructurados (no un resumen en texto):
+          el renderer de structlog los formatea solo si emite el evento
+        - Si se escribe a archivo, la decisión completa ya queda ahí
+          (serializada una vez): el evento solo lleva los identificadores
+          para correlacionar por trace_id, sin re-serializar la decisión
+        - Los campos vienen armados desde _snapshot
         """
-        logger.info(
-            "audit_event",
-            trace_id=entry["trace_id"],
-            action=entry["action"],
-            entity_id=entry["entity_id"],
-            entity_type=entry["entity_type"],
-            decision_summary=self._summarize_decision(entry["decision"])
-        )
+        logger.info("audit_event", **fields)
 
-    def _summarize_decision(self, decision: Dict[str, Any]) -> str:
+    @staticmethod
+    def _serialize(entry: Dict[str, Any]) -> str:
         """
-        Genera un resumen corto de la decisión para el log.
-        """
-        parts = []
-
-        if "classification" in decision:
-            cls = decision["classification"]
-            parts.append(
-                f"classified:{cls.get('category', '?')}/{cls.get('priority', '?')}"
-            )
-
-        if "routing" in decision:
-            rt = decision["routing"]
-            parts.append(f"routed:{rt.get('department', '?')}")
-            if rt.get("escalated"):
-                parts.append("escalated:true")
+        Serializa un entry a JSON en una sola pasada.
 
-        return " ".join(parts) if parts else "decision_logged"
+        Los valores no serializables (objetos arbitrarios en la decisión)
+        se convierten a str durante el mismo recorrido del encoder.
+        """
+        return json.dumps(entry, default=str)
 
-    def _write_to_file(self, entry: Dict[str, Any]) -> None:
+    def _write_to_file(self, records: List[AuditRecord]) -> None:
         """
-        Escribe el entry a un archivo JSONL.
+        Serializa y escribe un lote de entries a un archivo JSONL.
 
         PEDAGOGÍA:
         - JSONL = un JSON por línea, fácil de parsear
         - Append mode para no perder logs anteriores
+        - Cada entry se serializa aquí, en el worker: si uno no es
+          serializable (p.ej. claves no-str) se registra el error y se
+          omite, sin afectar al resto del lote ni al agente
+        - Un solo write por lote (no uno por entry)
+        - os.write sobre un fd con O_APPEND: sin la capa de buffering ni
+          el lock de io.BufferedWriter, y el append es atómico en POSIX
+        - El fd se reutiliza entre lotes, pero se reabre si el archivo fue
+          rotado o borrado (ver _ensure_fd)
         - En producción: usar sistema de logging distribuido
         """
+        lines = []
+        for fields, entry in records:
+            try:
+                lines.append(self._serialize(entry) + "\n")
+            except (TypeError, ValueError) as e:
+                logger.error(
+                    "audit_file_write_failed",
+                    error=str(e),
+                    trace_ids=[fields["trace_id"]]
+                )
+
+        if not lines:
+            return
+
         try:
-            with open(self.log_file_path, "a") as f:
-                f.write(json.dumps(entry) + "\n")
+            self._ensure_fd()
+
+            data = "".join(lines).encode()
+            view = memoryview(data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
         except Exception as e:
             logger.error(
                 "audit_file_write_failed",
                 error=str(e),
-                trace_id=entry.get("trace_id")
+                trace_ids=[fields["trace_id"] for fields, _ in records]
             )
 
+    def _ensure_fd(self) -> None:
+        """
+        Deja self._fd apuntando al archivo que hoy está en log_file_path.
+
+        PEDAGOGÍA:
+        - Tras una rotación (logrotate) o un borrado, el fd abierto sigue
+          escribiendo en el inodo viejo: los logs se perderían en silencio
+        - Un os.stat por lote (no por entry) detecta el cambio comparando
+          (st_dev, st_ino) con los del archivo abierto
+        """
+        if self._fd is not None:
+            try:
+                st = os.stat(self.log_file_path)
+                current = (st.st_dev, st.st_ino)
+            except FileNotFoundError:
+                current = None
+
+            if current == self._fd_identity:
+                return
+
+            self._close_fd()
+
+        self._fd = os.open(
+            self.log_file_path,
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644
+        )
+        # Los agentes no llaman aclose(): el finalizer cierra el fd cuando
+        # la instancia se recolecta (o al salir del intérprete)
+        self._fd_finalizer = weakref.finalize(self, os.close, self._fd)
+        st = os.fstat(self._fd)
+        self._fd_identity = (st.st_dev, st.st_ino)
+
+    def _close_fd(self) -> None:
+        """Cierra el fd del archivo (si hay uno abierto) vía su finalizer."""
+        if self._fd_finalizer is not None:
+            # Llamar al finalizer cierra el fd y lo desactiva (no se cierra dos veces)
+            self._fd_finalizer()
+            self._fd_finalizer = None
+        self._fd = None
+        self._fd_identity = None
+
     async def query_logs(
         self,
         entity_id: Optional[str] = None,
@@ -293,14 +687,28 @@ class AuditTool(Tool):
         if not self.log_to_file:
             return []
 
+        # Asegurar que los entries encolados ya estén en el archivo
+        await self.flush()
+
+        # Pre-filtro barato: descartar líneas que no pueden coincidir
+        # sin parsear JSON (mismo formato que escribe _write_to_file)
+        needles = []
+        if entity_id:
+            needles.append(self._field_needle("entity_id", entity_id))
+        if action:
+            needles.append(self._field_needle("action", action))
+
         results = []
         try:
-            with open(self.log_file_path, "r") as f:
+            with open(self.log_file_path, "rb") as f:
                 for line in f:
                     if len(results) >= limit:
                         break
 
-                    entry = json.loads(line.strip())
+                    if any(needle not in line for needle in needles):
+                        continue
+
+                    entry = json.loads(line)
 
                     # Aplicar filtros
                     if entity_id and entry.get("entity_id") != entity_id:
@@ -316,3 +724,10 @@ class AuditTool(Tool):
             logger.error("audit_query_failed", error=str(e))
 
         return results
+
+    @staticmethod
+    def _field_needle(field: str, value: str) -> bytes:
+        """
+        Retorna los bytes de '"field": "value"' tal como los serializa json.dumps.
+        """
+        return f"{json.dumps(field)}: {json.dumps(value)}".encode()
@@ -12,12 +12,21 @@ PEDAGOGÍA:
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict
-from pydantic import BaseModel
-import json
+from typing import Any, Dict, List
+from functools import cached_property
+from pydantic import BaseModel, ConfigDict, ValidationError
 import re
 
 
+# Bloques de código markdown; el cierre es opcional. Se prefiere ```json
+# y, si no hay, se usa el primer ``` de cualquier lenguaje
+_JSON_FENCED_BLOCK_RE = re.compile(r"```json(.*?)(?:```|\Z)", re.DOTALL)
+_FENCED_BLOCK_RE = re.compile(r"```(.*?)(?:```|\Z)", re.DOTALL)
+
+# Objeto JSON: desde el primer { hasta el último }
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
 # ============================================================================
 # Clases Base Reutilizables
 # ============================================================================
@@ -33,7 +42,12 @@ class ToolDefinition(BaseModel):
     - name: Identificador único de la tool
     - description: El LLM usa esto para decidir cuándo llamar la tool
     - parameters: JSON Schema que valida los argumentos
+    - frozen: la definición es inmutable, se construye una vez y se comparte
+    - Las tools la crean con model_construct(): son constantes escritas en
+      el código, no input externo, así que no necesitan validación
     """
+    model_config = ConfigDict(frozen=True)
+
     name: str
     description: str
     parameters: Dict[str, Any]  # JSON Schema
@@ -63,6 +77,10 @@ class Tool(ABC):
         1. ¿Cuándo usar esta tool?
         2. ¿Qué parámetros necesita?
         3. ¿Qué tipo de datos espera?
+
+        La definición no cambia durante la vida de la tool: las subclases
+        pueden implementarla con @functools.cached_property para construirla
+        una sola vez.
         """
         pass
 
@@ -81,6 +99,42 @@ class Tool(ABC):
 # Checklist Tool Implementation
 # ============================================================================
 
+class ChecklistStep(BaseModel):
+    """
+    Un paso del checklist.
+
+    PEDAGOGÍA:
+    - Solo se exige que exista 'action'; el resto se acepta tal cual venga
+      (Any: sin coerción de tipos), igual que la validación manual previa
+    - Campos declarados en el orden del prompt: model_dump los retorna así
+    - extra="allow" conserva campos adicionales que el LLM agregue
+    """
+    model_config = ConfigDict(extra="allow")
+
+    step_number: Any = None
+    action: Any
+    required_documents: Any = None
+
+
+class Checklist(BaseModel):
+    """
+    Estructura esperada del checklist generado por el LLM.
+
+    PEDAGOGÍA:
+    - model_validate_json parsea y valida en una sola pasada (pydantic-core),
+      en vez de json.loads + validación manual campo por campo
+    - Contrato: title y steps presentes, steps lista de objetos con action;
+      los valores no se convierten ni se rechazan por tipo
+    """
+    model_config = ConfigDict(extra="allow")
+
+    title: Any
+    procedure_code: Any = None
+    steps: List[ChecklistStep]
+    estimated_time: Any = None
+    sla: Any = None
+
+
 class ChecklistTool(Tool):
     """
     Genera checklists estructurados a partir de procedimientos AFP.
@@ -102,6 +156,40 @@ class ChecklistTool(Tool):
     - Error Handling: Manejo robusto de respuestas no-JSON
     """
 
+    # Plantilla del prompt: el procedimiento va entre prefijo y sufijo fijos
+    _PROMPT_PREFIX = (
+        "Genera un checklist de pasos accionables a partir del siguiente procedimiento AFP.\n"
+        "\n"
+        "Procedimiento:\n"
+    )
+    _PROMPT_SUFFIX = """
+
+Formato de salida (JSON válido):
+{
+  "title": "Título del procedimiento",
+  "procedure_code": "PROC-XXX-NNN",
+  "steps": [
+    {
+      "step_number": 1,
+      "action": "Descripción clara y accionable de la tarea",
+      "required_documents": ["Documento 1", "Documento 2"]
+    },
+    {
+      "step_number": 2,
+      "action": "Siguiente paso del procedimiento",
+      "required_documents": ["Documento 3"]
+    }
+  ],
+  "estimated_time": "X días hábiles",
+  "sla": "X días hasta completar el proceso"
+}
+
+IMPORTANTE:
+- Retorna SOLO el JSON, sin texto adicional antes o después
+- Asegúrate de que sea JSON válido (comillas dobles, sin trailing commas)
+- Los pasos deben ser claros y accionables
+- Incluye todos los documentos mencionados en el procedimiento"""
+
     def __init__(self, model_provider):
         """
         Inicializa la Checklist Tool.
@@ -116,7 +204,7 @@ class ChecklistTool(Tool):
         """
         self.model_provider = model_provider
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
         """
         Define la tool para el LLM.
@@ -126,7 +214,7 @@ class ChecklistTool(Tool):
         - Los parámetros siguen JSON Schema estándar
         - required: lista los parámetros obligatorios
         """
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="generate_checklist",
             description=(
                 "Genera un checklist de pasos accionables a partir de un procedimiento AFP. "
@@ -206,46 +294,16 @@ class ChecklistTool(Tool):
         - Instrucciones claras: "SOLO JSON, sin texto adicional"
         - Formato explícito: Mostramos la estructura completa
         """
-        return f"""Genera un checklist de pasos accionables a partir del siguiente procedimiento AFP.
-
-Procedimiento:
-{procedure_text}
-
-Formato de salida (JSON válido):
-{{
-  "title": "Título del procedimiento",
-  "procedure_code": "PROC-XXX-NNN",
-  "steps": [
-    {{
-      "step_number": 1,
-      "action": "Descripción clara y accionable de la tarea",
-      "required_documents": ["Documento 1", "Documento 2"]
-    }},
-    {{
-      "step_number": 2,
-      "action": "Siguiente paso del procedimiento",
-      "required_documents": ["Documento 3"]
-    }}
-  ],
-  "estimated_time": "X días hábiles",
-  "sla": "X días hasta completar el proceso"
-}}
-
-IMPORTANTE:
-- Retorna SOLO el JSON, sin texto adicional antes o después
-- Asegúrate de que sea JSON válido (comillas dobles, sin trailing commas)
-- Los pasos deben ser claros y accionables
-- Incluye todos los documentos mencionados en el procedimiento"""
+        return self._PROMPT_PREFIX + procedure_text + self._PROMPT_SUFFIX
 
     def _parse_json_response(self, response: str) -> Dict:
         """
         Parsea la respuesta del LLM extrayendo JSON válido.
 
-        Estrategia simple y robusta:
-        1. Si hay ```json, eliminar todo antes (incluyendo eso)
-        2. Si hay ``` (cierre), eliminar eso y todo después
-        3. Buscar primer { y último }
-        4. Parse JSON
+        Estrategia simple y robusta (regex precompiladas):
+        1. Si hay un bloque ```json (o, si no, uno ```), quedarse con su contenido
+        2. Buscar desde el primer { hasta el último }
+        3. Parse JSON
 
         Args:
             response: Texto retornado por el LLM
@@ -254,75 +312,34 @@ IMPORTANTE:
             Dict con el checklist parseado
 
         Raises:
-            ValueError: Si no se encuentra JSON válido
+            ValueError: Si no se encuentra JSON válido o no tiene la
+                estructura de Checklist (title, steps[].action)
         """
-        cleaned = response.strip()
-
-        # 1. Si hay ```json, eliminar todo antes incluyendo eso
-        if "```json" in cleaned:
-            cleaned = cleaned.split("```json", 1)[1]
-        elif "```" in cleaned:
-            # Por si usa ``` sin la palabra json
-            cleaned = cleaned.split("```", 1)[1]
-
-        # 2. Si hay ``` de cierre, eliminar eso y todo después
-        if "```" in cleaned:
-            cleaned = cleaned.split("```")[0]
-
-        # 3. Extraer JSON (primer { hasta último })
-        cleaned = cleaned.strip()
-        start_idx = cleaned.find('{')
-        end_idx = cleaned.rfind('}')
+        # 1. Contenido del bloque markdown, si existe
+        fenced = (
+            _JSON_FENCED_BLOCK_RE.search(response)
+            or _FENCED_BLOCK_RE.search(response)
+        )
+        cleaned = fenced.group(1) if fenced else response
 
-        if start_idx == -1 or end_idx == -1 or end_idx <= start_idx:
+        # 2. Extraer JSON (primer { hasta último })
+        match = _JSON_OBJECT_RE.search(cleaned)
+        if not match:
             raise ValueError(
                 f"No se encontró JSON válido en la respuesta.\n"
                 f"Respuesta (primeros 500 chars): {response[:500]}"
             )
 
-        json_str = cleaned[start_idx:end_idx+1]
+        json_str = match.group(0)
 
-        # 4. Parse JSON
+        # 3. Parse + validación en una sola pasada
         try:
-            checklist = json.loads(json_str)
-            self._validate_checklist(checklist)
-            return checklist
-        except json.JSONDecodeError as e:
+            checklist = Checklist.model_validate_json(json_str)
+        except ValidationError as e:
             raise ValueError(
-                f"JSON inválido: {e}\n"
+                f"Checklist inválido: {e}\n"
                 f"JSON extraído (primeros 500 chars): {json_str[:500]}"
             )
 
-    def _validate_checklist(self, checklist: Dict) -> None:
-        """
-        Valida que el checklist tenga la estructura esperada.
-
-        PEDAGOGÍA:
-        - Defensive programming: Verificar estructura antes de retornar
-        - Mensajes de error claros para debugging
-
-        Args:
-            checklist: Diccionario a validar
-
-        Raises:
-            ValueError: Si falta algún campo requerido
-        """
-        required_fields = ["title", "steps"]
-        missing_fields = [f for f in required_fields if f not in checklist]
-
-        if missing_fields:
-            raise ValueError(
-                f"Checklist inválido. Faltan campos requeridos: {missing_fields}"
-            )
-
-        # Validar que steps sea una lista
-        if not isinstance(checklist["steps"], list):
-            raise ValueError("Campo 'steps' debe ser una lista")
-
-        # Validar estructura de cada step
-        for idx, step in enumerate(checklist["steps"]):
-            if not isinstance(step, dict):
-                raise ValueError(f"Step {idx} no es un diccionario")
-
-            if "action" not in step:
-                raise ValueError(f"Step {idx} no tiene campo 'action'")
+        # exclude_unset: retornar solo lo que vino en la respuesta del LLM
+        return checklist.model_dump(exclude_unset=True)
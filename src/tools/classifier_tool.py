@@ -11,9 +11,21 @@ PEDAGOGÍA:
 - Explicabilidad: el LLM justifica su decisión
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, NotRequired, Optional, Tuple, TypedDict
+from functools import cached_property
+from collections import OrderedDict
+import asyncio
+import hashlib
 import json
 
+# orjson (C) es opcional y no es dependencia del proyecto: si está
+# instalado se usa para parsear; si no, la stdlib
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 from src.tools.checklist_tool import Tool, ToolDefinition
 from src.agents.reclamos.config import (
     CATEGORIES,
@@ -24,6 +36,86 @@ from src.agents.reclamos.config import (
 )
 
 
+# Conjuntos para validar category/priority en O(1) (en config son listas)
+_CATEGORY_SET = frozenset(CATEGORY_NAMES)
+_PRIORITY_SET = frozenset(PRIORITY_LEVELS)
+
+# SLA por prioridad: (hours, description, requires_escalation)
+_SLA_BY_PRIORITY: Dict[str, Tuple[int, str, bool]] = {
+    priority: (
+        sla["hours"],
+        sla["description"],
+        sla.get("requires_escalation", False)
+    )
+    for priority, sla in SLA_RULES.items()
+}
+_SLA_NORMAL = _SLA_BY_PRIORITY["normal"]
+
+# Errores esperables de una clasificación: el ModelProvider envuelve las
+# fallas del LLM en RuntimeError (ValueError si la respuesta no sirve).
+# Cualquier otra excepción es un bug y debe propagarse
+_CLASSIFY_ERRORS = (RuntimeError, ValueError)
+
+
+class Classification(TypedDict):
+    """
+    Resultado de ClassifierTool.execute.
+
+    PEDAGOGÍA:
+    - TypedDict documenta el esquema para el type checker sin costo en
+      runtime: sigue siendo un dict (los agentes acceden por clave)
+    """
+    category: str
+    priority: str
+    confidence: float
+    reasoning: str
+    keywords_detected: List[str]
+    sla_hours: int
+    sla_description: str
+    requires_escalation: bool
+    channel: NotRequired[str]
+    channel_adjustment: NotRequired[str]
+    fallback: NotRequired[bool]
+    fallback_reason: NotRequired[str]
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json_object(s: str) -> Dict[str, Any] | None:
+    """
+    Extrae y parsea el primer objeto JSON válido de s.
+
+    PEDAGOGÍA:
+    - Si hay un bloque ```json, se busca solo dentro de él (el cierre es
+      opcional); str.find en vez de una regex no-greedy, que avanza de a
+      un carácter buscando el cierre
+    - raw_decode parsea desde cada { sucesivo y se detiene al cerrar el
+      objeto: una { suelta en el texto ("Aquí {tu} respuesta") no hace
+      fallar el parseo, se prueba con la siguiente
+    - El recorrido lo hace el decoder de json (en C), no un loop de Python
+    - Retorna None si ningún { inicia un objeto JSON válido
+    """
+    fence = s.find("```json")
+    if fence != -1:
+        body_start = fence + 7
+        body_end = s.find("```", body_start)
+        s = s[body_start:] if body_end == -1 else s[body_start:body_end]
+
+    start = s.find("{")
+    while start != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(s, start)
+        except ValueError:
+            pass
+        else:
+            if isinstance(obj, dict):
+                return obj
+        start = s.find("{", start + 1)
+
+    return None
+
+
 class ClassifierTool(Tool):
     """
     Clasifica reclamos de clientes usando LLM.
@@ -50,6 +142,9 @@ class ClassifierTool(Tool):
     - Reasoning para explicabilidad y debugging
     """
 
+    # Máximo de reclamos distintos en la caché local de resultados (LRU)
+    _RESULT_CACHE_SIZE = 512
+
     def __init__(self, model_provider):
         """
         Inicializa el ClassifierTool.
@@ -60,11 +155,15 @@ class ClassifierTool(Tool):
         PEDAGOGÍA:
         - Inyección de dependencias del model provider
         - Permite cambiar de Gemini a Claude sin modificar esta clase
+        - _result_cache: clasificaciones ya obtenidas del LLM, por hash del
+          reclamo normalizado (reintentos, replays y reclamos repetidos)
         """
         self.model_provider = model_provider
         self.config = LLM_CONFIG.get("classifier", {})
+        self._result_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._prompt_prefix, self._prompt_suffix = self._build_prompt_template()
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
         """
         Define la tool para el LLM.
@@ -73,7 +172,7 @@ class ClassifierTool(Tool):
         - Description clara para que el orquestador sepa cuándo usarla
         - Parameters con tipos y descripciones
         """
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="classify_claim",
             description=(
                 "Clasifica un reclamo de cliente según categoría, prioridad y SLA. "
@@ -100,7 +199,7 @@ class ClassifierTool(Tool):
         self,
         claim_text: str,
         channel: str = "web"
-    ) -> Dict[str, Any]:
+    ) -> Classification:
         """
         Clasifica un reclamo de cliente.
 
@@ -128,6 +227,13 @@ class ClassifierTool(Tool):
                 reason="Reclamo muy corto o vacío"
             )
 
+        # Reclamo ya clasificado: sin llamada al LLM (el canal se aplica igual)
+        cache_key = self._cache_key(claim_text)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            return self._finalize(cached, channel)
+
         # Construir prompt
         prompt = self._build_classification_prompt(claim_text)
 
@@ -135,19 +241,82 @@ class ClassifierTool(Tool):
         response = await self.model_provider.generate(
             prompt=prompt,
             temperature=self.config.get("temperature", 0.3),
-            max_tokens=self.config.get("max_tokens", 1000)
+            max_tokens=self.config.get("max_tokens", 1000),
+            response_format=self.config.get("response_format")
         )
 
         # Parsear respuesta
-        classification = self._parse_classification_response(response)
+        classification, error = self._parse_classification_response(response)
+
+        # Sin JSON utilizable: clasificación por defecto (ya trae SLA, no se
+        # cachea para reintentar). Se decide aquí y no por una clave del
+        # dict, que el LLM podría incluir en su JSON
+        if classification is None:
+            fallback = self._default_classification(reason=error)
+            fallback["channel"] = channel
+            return fallback
+
+        # Cachear solo respuestas válidas del LLM
+        self._result_cache[cache_key] = classification
+        if len(self._result_cache) > self._RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+
+        # Validar, aplicar reglas de SLA y ajustar por canal
+        return self._finalize(classification, channel)
+
+    @staticmethod
+    def _cache_key(claim_text: str) -> str:
+        """
+        Clave de caché: hash del reclamo normalizado (strip + lower).
 
-        # Aplicar reglas de SLA
-        classification = self._apply_sla_rules(classification)
+        PEDAGOGÍA:
+        - blake2b con digest de 16 bytes: clave corta y sin colisiones
+          prácticas, sin guardar el texto completo del reclamo
+        """
+        normalized = claim_text.strip().lower().encode()
+        return hashlib.blake2b(normalized, digest_size=16).hexdigest()
 
-        # Ajustar por canal si es necesario
-        classification = self._adjust_for_channel(classification, channel)
+    async def execute_batch(
+        self,
+        claims: List[Dict[str, Any]],
+        max_concurrency: int = 8
+    ) -> List[Classification]:
+        """
+        Clasifica varios reclamos con llamadas concurrentes al LLM.
+
+        Args:
+            claims: Lista de dicts con claim_text y channel (opcional)
+            max_concurrency: Máximo de llamadas simultáneas al LLM
 
-        return classification
+        Returns:
+            Lista de clasificaciones en el mismo orden que claims
+
+        PEDAGOGÍA:
+        - asyncio.gather lanza todas las llamadas a la vez: el tiempo total
+          es ~el de la llamada más lenta, no la suma de N round-trips
+        - El servidor del LLM puede agrupar las requests concurrentes
+        - El Semaphore respeta los rate limits del provider
+        - Un error del LLM en un reclamo no afecta a los demás (clasificación
+          default, con la misma forma que el fallback de execute)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def classify(claim: Dict[str, Any]) -> Classification:
+            channel = claim.get("channel", "web")
+            async with semaphore:
+                try:
+                    return await self.execute(
+                        claim_text=claim.get("claim_text", ""),
+                        channel=channel
+                    )
+                except _CLASSIFY_ERRORS as e:
+                    fallback = self._default_classification(
+                        reason=f"Error llamando al LLM: {e}"
+                    )
+                    fallback["channel"] = channel
+                    return fallback
+
+        return await asyncio.gather(*(classify(claim) for claim in claims))
 
     def _build_classification_prompt(self, claim_text: str) -> str:
         """
@@ -157,6 +326,20 @@ class ClassifierTool(Tool):
         - Lista todas las categorías disponibles con descripciones
         - Solicita JSON estructurado
         - Pide justificación para explicabilidad
+        - Solo el reclamo cambia entre llamadas: prefijo y sufijo se
+          construyen una vez en __init__ (ver _build_prompt_template)
+        """
+        return f'{self._prompt_prefix}{claim_text}{self._prompt_suffix}'
+
+    @staticmethod
+    def _build_prompt_template() -> Tuple[str, str]:
+        """
+        Construye las partes fijas del prompt (antes y después del reclamo).
+
+        PEDAGOGÍA:
+        - CATEGORIES y CATEGORY_NAMES son constantes: se interpolan una vez
+        - Un prefijo estable permite que el provider reutilice su caché
+          de prompts (menos tokens de entrada procesados y menor latencia)
         """
         # Construir lista de categorías con descripciones
         categories_text = "\n".join([
@@ -164,11 +347,15 @@ class ClassifierTool(Tool):
             for key, cat in CATEGORIES.items()
         ])
 
-        return f"""Eres un clasificador de reclamos de AFP Integra.
-Tu tarea es analizar el siguiente reclamo y clasificarlo.
+        prefix = (
+            "Eres un clasificador de reclamos de AFP Integra.\n"
+            "Tu tarea es analizar el siguiente reclamo y clasificarlo.\n"
+            "\n"
+            "RECLAMO DEL CLIENTE:\n"
+            '"'
+        )
 
-RECLAMO DEL CLIENTE:
-"{claim_text}"
+        suffix = '"' + f"""
 
 CATEGORÍAS DISPONIBLES:
 {categories_text}
@@ -202,66 +389,67 @@ IMPORTANTE:
 - Si no estás seguro, usa confidence bajo y categoría "atencion"
 """
 
-    def _parse_classification_response(self, response: str) -> Dict[str, Any]:
+        return prefix, suffix
+
+    def _parse_classification_response(
+        self,
+        response: str
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
         """
         Parsea la respuesta del LLM extrayendo el JSON.
 
+        Retorna (json, "") con el JSON tal como vino del LLM (lo valida
+        _finalize), o (None, motivo) si no se pudo parsear.
+
         PEDAGOGÍA:
-        - Manejo robusto de respuestas malformadas
+        - Con JSON mode la respuesta ya es JSON puro: se parsea directo
+        - Manejo robusto de respuestas malformadas (texto o markdown extra)
         - Fallback a clasificación default si falla
         """
-        try:
-            # Limpiar respuesta
-            cleaned = response.strip()
-
-            # Remover markdown si existe
-            if "```json" in cleaned:
-                cleaned = cleaned.split("```json", 1)[1]
-            if "```" in cleaned:
-                cleaned = cleaned.split("```")[0]
-
-            # Extraer JSON
-            start_idx = cleaned.find('{')
-            end_idx = cleaned.rfind('}')
-
-            if start_idx == -1 or end_idx == -1:
-                return self._default_classification(
-                    reason="No se encontró JSON en respuesta del LLM"
-                )
+        # Con tools registradas el provider puede retornar un dict (tool call)
+        if not isinstance(response, str):
+            return None, "Respuesta del LLM no es texto"
 
-            json_str = cleaned[start_idx:end_idx + 1]
-            classification = json.loads(json_str)
-
-            # Validar campos requeridos
-            classification = self._validate_classification(classification)
+        # Camino rápido: respuesta en JSON mode. json/orjson.JSONDecodeError
+        # heredan de ValueError; cualquier otra excepción es un bug
+        try:
+            classification = _loads(response)
+            if isinstance(classification, dict):
+                return classification, ""
+        except ValueError:
+            pass
 
-            return classification
+        # Extraer JSON (bloque ```json o primer objeto válido)
+        classification = _extract_json_object(response)
 
-        except json.JSONDecodeError as e:
-            return self._default_classification(
-                reason=f"Error parseando JSON: {e}"
-            )
-        except Exception as e:
-            return self._default_classification(
-                reason=f"Error inesperado: {e}"
-            )
+        if classification is None:
+            return None, "No se encontró JSON válido en respuesta del LLM"
+        return classification, ""
 
-    def _validate_classification(self, classification: Dict) -> Dict:
+    def _finalize(self, classification: Dict, channel: str) -> Classification:
         """
-        Valida y normaliza la clasificación.
+        Valida la clasificación, aplica SLA y ajusta por canal en una pasada.
 
         PEDAGOGÍA:
         - Asegura que category y priority sean valores válidos
-        - Aplica defaults si faltan campos
+        - Las reglas de SLA son determinísticas (no LLM): separar decisión
+          (LLM) de política (reglas de negocio)
+        - El canal puede afectar la prioridad: reclamos presenciales con
+          prioridad normal y confidence alto se marcan como candidatos
+        - El resultado se arma en un solo dict (antes: 3 helpers que
+          reescribían las mismas claves); claves extra del LLM se descartan
+        - Solo recibe JSON del LLM: los fallbacks no pasan por aquí
         """
         # Validar category
-        category = classification.get("category", "atencion").lower()
-        if category not in CATEGORY_NAMES:
+        category = classification.get("category", "atencion")
+        category = category.lower() if isinstance(category, str) else "atencion"
+        if category not in _CATEGORY_SET:
             category = "atencion"
 
         # Validar priority
-        priority = classification.get("priority", "normal").lower()
-        if priority not in PRIORITY_LEVELS:
+        priority = classification.get("priority", "normal")
+        priority = priority.lower() if isinstance(priority, str) else "normal"
+        if priority not in _PRIORITY_SET:
             priority = "normal"
 
         # Validar confidence
@@ -272,58 +460,38 @@ IMPORTANTE:
         except (TypeError, ValueError):
             confidence = 0.5
 
-        return {
+        # SLA según prioridad
+        hours, description, requires_escalation = _SLA_BY_PRIORITY.get(
+            priority, _SLA_NORMAL
+        )
+
+        # Copia: la clasificación puede venir de _result_cache y un caller
+        # que modifique la lista no debe alterar los próximos cache hits
+        keywords = classification.get("keywords_detected", [])
+        if isinstance(keywords, list):
+            keywords = list(keywords)
+
+        result = {
             "category": category,
             "priority": priority,
             "confidence": confidence,
             "reasoning": classification.get("reasoning", "Sin explicación"),
-            "keywords_detected": classification.get("keywords_detected", [])
+            "keywords_detected": keywords,
+            "sla_hours": hours,
+            "sla_description": description,
+            "requires_escalation": requires_escalation
         }
 
-    def _apply_sla_rules(self, classification: Dict) -> Dict:
-        """
-        Aplica reglas de SLA basadas en la prioridad.
+        # Si es presencial y es normal con confidence alto, candidato a subir.
+        # Opcionalmente podríamos subir la prioridad; por ahora solo se marca
+        if (channel == "presencial" and priority == "normal"
+                and confidence >= 0.8):
+            result["channel_adjustment"] = "presencial_boost_candidate"
 
-        PEDAGOGÍA:
-        - Las reglas de SLA son determinísticas (no LLM)
-        - Separar decisión (LLM) de política (reglas de negocio)
-        """
-        priority = classification["priority"]
-        sla_config = SLA_RULES.get(priority, SLA_RULES["normal"])
+        result["channel"] = channel
+        return result
 
-        classification["sla_hours"] = sla_config["hours"]
-        classification["sla_description"] = sla_config["description"]
-        classification["requires_escalation"] = sla_config.get(
-            "requires_escalation", False
-        )
-
-        return classification
-
-    def _adjust_for_channel(
-        self,
-        classification: Dict,
-        channel: str
-    ) -> Dict:
-        """
-        Ajusta la clasificación según el canal de origen.
-
-        PEDAGOGÍA:
-        - El canal puede afectar la prioridad
-        - Reclamos presenciales con prioridad alta → más urgentes
-        """
-        # Si es presencial y ya es high o critical, mantener
-        # Si es presencial y es normal con confidence alto, subir a high
-        if channel == "presencial":
-            if (classification["priority"] == "normal" and
-                classification["confidence"] >= 0.8):
-                # Opcionalmente podríamos subir la prioridad
-                # Por ahora solo lo marcamos
-                classification["channel_adjustment"] = "presencial_boost_candidate"
-
-        classification["channel"] = channel
-        return classification
-
-    def _default_classification(self, reason: str = "") -> Dict[str, Any]:
+    def _default_classification(self, reason: str = "") -> Classification:
         """
         Retorna una clasificación por defecto cuando algo falla.
 
@@ -332,7 +500,7 @@ IMPORTANTE:
         - Usar categoría genérica con prioridad normal
         - Registrar razón del fallback para debugging
         """
-        sla_config = SLA_RULES["normal"]
+        hours, description, _ = _SLA_NORMAL
 
         return {
             "category": "atencion",
@@ -340,8 +508,8 @@ IMPORTANTE:
             "confidence": 0.0,
             "reasoning": f"Clasificación por defecto. {reason}",
             "keywords_detected": [],
-            "sla_hours": sla_config["hours"],
-            "sla_description": sla_config["description"],
+            "sla_hours": hours,
+            "sla_description": description,
             "requires_escalation": False,
             "fallback": True,
             "fallback_reason": reason
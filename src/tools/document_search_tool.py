@@ -6,8 +6,11 @@ Tools para el Agente Buscador:
 - ReadDocumentTool: Lee el contenido de un documento específico
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, TypedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
+import asyncio
 import os
 import re
 
@@ -15,19 +18,118 @@ from src.tools.checklist_tool import Tool, ToolDefinition
 from src.agents.buscador.config import ALLOWED_FILE_TYPES, FILE_EXTENSIONS
 
 
+# Tipo de documento según palabra clave en el nombre: (palabra, tipo) en
+# orden de prioridad, gana la primera palabra presente (no la más a la izquierda)
+_DOC_TYPES = (
+    ("certificado", "certificado"),
+    ("traspaso", "traspaso"),
+    ("reclamo", "reclamo"),
+    ("pension", "pension"),
+    ("beneficiario", "beneficiarios"),
+    ("cobranza", "cobranza"),
+)
+
+# Pool compartido para recorrer subdirectorios en paralelo (los threads se
+# crean recién cuando se usan; readdir/stat liberan el GIL)
+_SCAN_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="doc-scan")
+
+
+class DocumentEntry(TypedDict):
+    """Un documento en el resultado de ListDocumentsTool (es un dict)."""
+    filename: str
+    type: str
+    size_bytes: int
+    extension: str
+
+
+@lru_cache(maxsize=128)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    """
+    Compila el patrón de filtro (case-insensitive), con cache.
+
+    Si no es una regex válida se usa como texto literal.
+    """
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return re.compile(re.escape(pattern), re.IGNORECASE)
+
+
+def _iter_files(root: str) -> Iterator[os.DirEntry]:
+    """
+    Recorre root recursivamente con os.scandir y retorna los archivos.
+
+    - DirEntry trae el tipo desde readdir: is_dir/is_file no hacen stat extra
+    - No sigue symlinks a directorios (igual que os.walk por defecto)
+    - Ignora directorios sin permisos de lectura
+    """
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+        except OSError:
+            continue
+
+
+def _split_level(root: str) -> Tuple[List[os.DirEntry], List[str]]:
+    """
+    Lista un solo nivel de root: (archivos, subdirectorios).
+
+    Mismas reglas que _iter_files (no sigue symlinks a directorios).
+    """
+    files: List[os.DirEntry] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry)
+    except OSError:
+        pass
+    return files, subdirs
+
+
+@lru_cache(maxsize=1024)
+def _is_safe_relative(path: str) -> bool:
+    """
+    Chequeo léxico (sin syscalls): path relativo y sin componentes "..".
+
+    Un path así, unido a un directorio base, nunca sale de él salvo que
+    pase por un symlink (eso lo cubre PathValidator.validate).
+    """
+    return (
+        "\0" not in path
+        and not os.path.isabs(path)
+        and ".." not in Path(path).parts
+    )
+
+
 class PathValidator:
     """Valida paths para prevenir path traversal."""
 
     def __init__(self, base_path: Path):
         self.base_path = base_path.resolve()
+        self._base_prefix = os.path.join(str(self.base_path), "")
 
     def validate(self, path: str) -> bool:
-        """Verifica que el path esté dentro del directorio base."""
-        try:
-            resolved = (self.base_path / path).resolve()
-            return resolved.is_relative_to(self.base_path)
-        except Exception:
+        """
+        Verifica que el path esté dentro del directorio base.
+
+        Primero el chequeo léxico (cacheado, sin I/O) y luego se resuelven
+        symlinks contra el filesystem: un path que pasa por un symlink
+        hacia afuera del directorio base se rechaza.
+        """
+        if not _is_safe_relative(path):
             return False
+        resolved = os.path.realpath(os.path.join(self.base_path, path))
+        return resolved == str(self.base_path) or resolved.startswith(self._base_prefix)
 
 
 class ListDocumentsTool(Tool):
@@ -42,9 +144,9 @@ class ListDocumentsTool(Tool):
         self.base_path = Path(base_path).resolve()
         self.path_validator = PathValidator(self.base_path)
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="list_documents",
             description=(
                 "Lista los documentos disponibles en el sistema de archivos. "
@@ -101,58 +203,49 @@ class ListDocumentsTool(Tool):
             extensions = FILE_EXTENSIONS.get(file_type, [])
 
         # Preparar filtro
-        pattern_regex = None
-        if filter_pattern:
-            try:
-                pattern_regex = re.compile(filter_pattern, re.IGNORECASE)
-            except re.error:
-                pattern_regex = re.compile(re.escape(filter_pattern), re.IGNORECASE)
-
-        # Listar archivos
-        documents = []
-
-        for root, dirs, files in os.walk(self.base_path):
-            for filename in files:
-                # Filtrar por extensión
-                if extensions and not any(filename.lower().endswith(ext) for ext in extensions):
-                    continue
-
-                # Filtrar por patrón
-                if pattern_regex and not pattern_regex.search(filename):
-                    continue
-
-                file_path = Path(root) / filename
-                rel_path = file_path.relative_to(self.base_path)
-
-                if not self.path_validator.validate(str(rel_path)):
-                    continue
-
-                stat = file_path.stat()
-
-                # Extraer tipo de documento del nombre
-                doc_type = "unknown"
-                if "certificado" in filename.lower():
-                    doc_type = "certificado"
-                elif "traspaso" in filename.lower():
-                    doc_type = "traspaso"
-                elif "reclamo" in filename.lower():
-                    doc_type = "reclamo"
-                elif "pension" in filename.lower():
-                    doc_type = "pension"
-                elif "beneficiario" in filename.lower():
-                    doc_type = "beneficiarios"
-                elif "cobranza" in filename.lower():
-                    doc_type = "cobranza"
-
-                documents.append({
-                    "filename": filename,
-                    "type": doc_type,
-                    "size_bytes": stat.st_size,
-                    "extension": file_path.suffix
-                })
-
-        # Ordenar por nombre
-        documents.sort(key=lambda d: d["filename"])
+        pattern_regex = _compile_pattern(filter_pattern) if filter_pattern else None
+
+        # Listar archivos: columnas paralelas (un dict por documento recién al final)
+        filenames: List[str] = []
+        doc_types: List[str] = []
+        sizes: List[int] = []
+        exts: List[str] = []
+        extensions_tuple = tuple(ext.lower() for ext in extensions)
+        base_dir = str(self.base_path)
+
+        # Todo el I/O corre en el pool (el event loop no se bloquea): primero
+        # el primer nivel y luego cada subdirectorio en su propio thread, para
+        # solapar la latencia de readdir/stat (NFS, SMB, discos lentos)
+        loop = asyncio.get_running_loop()
+        top_files, subdirs = await loop.run_in_executor(
+            _SCAN_POOL, _split_level, base_dir
+        )
+        scans = [top_files] + [_iter_files(subdir) for subdir in subdirs]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                _SCAN_POOL, self._scan,
+                entries, base_dir, extensions_tuple, pattern_regex
+            )
+            for entries in scans
+        ))
+
+        for names, types, sizes_part, exts_part in results:
+            filenames.extend(names)
+            doc_types.extend(types)
+            sizes.extend(sizes_part)
+            exts.extend(exts_part)
+
+        # Ordenar por nombre: se ordenan índices, no dicts
+        order = sorted(range(len(filenames)), key=filenames.__getitem__)
+        documents: List[DocumentEntry] = [
+            {
+                "filename": filenames[i],
+                "type": doc_types[i],
+                "size_bytes": sizes[i],
+                "extension": exts[i]
+            }
+            for i in order
+        ]
 
         return {
             "filter_pattern": filter_pattern or "(ninguno)",
@@ -162,6 +255,58 @@ class ListDocumentsTool(Tool):
             "hint": "Usa read_document(filename) para leer el contenido de un documento específico"
         }
 
+    def _scan(
+        self,
+        entries: Iterable[os.DirEntry],
+        base_dir: str,
+        extensions_tuple: Tuple[str, ...],
+        pattern_regex: re.Pattern | None
+    ) -> Tuple[List[str], List[str], List[int], List[str]]:
+        """
+        Filtra y extrae metadata de los archivos (corre en un thread del pool).
+
+        Returns:
+            Columnas (filenames, doc_types, sizes, extensions)
+        """
+        filenames: List[str] = []
+        doc_types: List[str] = []
+        sizes: List[int] = []
+        exts: List[str] = []
+
+        for entry in entries:
+            filename = entry.name
+            lower_name = filename.lower()
+
+            # Filtrar por extensión
+            if extensions_tuple and not lower_name.endswith(extensions_tuple):
+                continue
+
+            # Filtrar por patrón
+            if pattern_regex and not pattern_regex.search(filename):
+                continue
+
+            # Lo recorrido con scandir ya está bajo base_path; solo un
+            # symlink puede apuntar fuera, así que solo esos se resuelven
+            if entry.is_symlink():
+                rel_path = os.path.relpath(entry.path, base_dir)
+                if not self.path_validator.validate(rel_path):
+                    continue
+
+            stat = entry.stat()
+
+            # Extraer tipo de documento del nombre
+            doc_type = next(
+                (t for keyword, t in _DOC_TYPES if keyword in lower_name),
+                "unknown"
+            )
+
+            filenames.append(filename)
+            doc_types.append(doc_type)
+            sizes.append(stat.st_size)
+            exts.append(os.path.splitext(filename)[1])
+
+        return filenames, doc_types, sizes, exts
+
 
 class ReadDocumentTool(Tool):
     """
@@ -174,9 +319,14 @@ class ReadDocumentTool(Tool):
         self.base_path = Path(base_path).resolve()
         self.path_validator = PathValidator(self.base_path)
 
-    @property
+        # Índice nombre -> ruta para archivos en subdirectorios (lazy),
+        # junto con el mtime de cada directorio al momento de construirlo
+        self._filename_index: Dict[str, Path] | None = None
+        self._index_dir_mtimes: Dict[str, float] = {}
+
+    @cached_property
     def definition(self) -> ToolDefinition:
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="read_document",
             description=(
                 "Lee el contenido completo de un documento específico. "
@@ -204,7 +354,7 @@ class ReadDocumentTool(Tool):
         Returns:
             Dict con el contenido del documento
         """
-        # Validar path
+        # Validar path (resolviendo symlinks: es una lectura puntual)
         if not self.path_validator.validate(filename):
             return {
                 "error": "Nombre de archivo inválido o intento de path traversal",
@@ -215,11 +365,8 @@ class ReadDocumentTool(Tool):
 
         if not file_path.exists():
             # Intentar buscar el archivo (por si hay subdirectorios)
-            found = None
-            for root, dirs, files in os.walk(self.base_path):
-                if filename in files:
-                    found = Path(root) / filename
-                    break
+            self._ensure_index()
+            found = self._filename_index.get(filename)
 
             if not found:
                 return {
@@ -232,14 +379,23 @@ class ReadDocumentTool(Tool):
         # Leer contenido
         try:
             if file_path.suffix.lower() == ".txt":
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
+                # Leer bytes una vez: size_bytes real y conteo de líneas en C
+                with open(file_path, "rb") as f:
+                    data = f.read()
+
+                content = data.decode("utf-8", errors="ignore")
+                if "\r" in content:
+                    # Normalizar saltos de línea como lo hace el modo texto
+                    content = content.replace("\r\n", "\n").replace("\r", "\n")
+                    lines = content.count("\n") + 1
+                else:
+                    lines = data.count(b"\n") + 1
 
                 return {
                     "filename": filename,
                     "content": content,
-                    "size_bytes": len(content),
-                    "lines": content.count("\n") + 1
+                    "size_bytes": len(data),
+                    "lines": lines
                 }
             else:
                 return {
@@ -254,6 +410,57 @@ class ReadDocumentTool(Tool):
                 "filename": filename
             }
 
+    def _ensure_index(self) -> None:
+        """
+        Construye (o reconstruye si cambió) el índice nombre -> ruta.
+
+        Agregar o quitar un archivo cambia el mtime de su directorio, así
+        que basta un stat por directorio para saber si el índice sigue
+        vigente, en vez de recorrer todos los archivos en cada búsqueda.
+
+        El recorrido es el preorden de os.walk (archivos del directorio
+        antes que sus subdirectorios, éstos en orden de scandir): con un
+        nombre repetido gana el mismo archivo que encontraba os.walk.
+        """
+        if self._filename_index is not None and self._index_is_fresh():
+            return
+
+        index: Dict[str, Path] = {}
+        dir_mtimes: Dict[str, float] = {}
+        pending = [str(self.base_path)]
+
+        while pending:
+            directory = pending.pop()
+            subdirs = []
+            try:
+                dir_mtimes[directory] = os.stat(directory).st_mtime
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        # Como os.walk: un symlink a directorio no es archivo
+                        # ni se recorre (followlinks=False)
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                        else:
+                            index.setdefault(entry.name, Path(entry.path))
+            except OSError:
+                continue
+            # Pila: se apilan al revés para visitarlos en orden de scandir
+            pending.extend(reversed(subdirs))
+
+        self._filename_index = index
+        self._index_dir_mtimes = dir_mtimes
+
+    def _index_is_fresh(self) -> bool:
+        """True si ningún directorio indexado cambió desde la última construcción."""
+        try:
+            return all(
+                os.stat(directory).st_mtime == mtime
+                for directory, mtime in self._index_dir_mtimes.items()
+            )
+        except OSError:
+            return False
+
 
 # Alias para compatibilidad con código existente
 class DocumentSearchTool(ListDocumentsTool):
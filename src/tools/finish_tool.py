@@ -5,7 +5,8 @@ Tool para el Agente Buscador que señala el fin de la búsqueda
 y genera la respuesta final consolidada.
 """
 
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
+from functools import cached_property
 from src.tools.checklist_tool import Tool, ToolDefinition
 
 
@@ -17,9 +18,9 @@ class FinishTool(Tool):
     suficiente información para responder al usuario.
     """
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="finish",
             description="Termina la búsqueda y genera la respuesta final con la información recopilada. Usa esta tool cuando tengas suficiente información para responder.",
             parameters={
@@ -70,3 +71,35 @@ class FinishTool(Tool):
             "confidence": confidence,
             "finished": True
         }
+
+    async def execute_stream(
+        self,
+        summary: str,
+        sources: List[str] = None,
+        confidence: str = "medium",
+        chunk_size: int = 512
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante de execute que entrega el summary en fragmentos.
+
+        El consumidor puede ir mostrando la respuesta sin esperar el
+        summary completo. El último registro trae sources y confidence.
+
+        Args:
+            summary: Resumen de hallazgos
+            sources: Fuentes consultadas
+            confidence: Nivel de confianza
+            chunk_size: Caracteres por fragmento del summary
+
+        Yields:
+            {"delta": fragmento} por cada parte del summary, y al final
+            {"sources": [...], "confidence": ..., "finished": True}
+        """
+        for start in range(0, len(summary), chunk_size):
+            yield {"delta": summary[start:start + chunk_size]}
+
+        yield {
+            "sources": sources or [],
+            "confidence": confidence,
+            "finished": True
+        }
@@ -4,8 +4,10 @@ Retrieval Tool usando Agent RAG
 Wrapper que expone el sistema Agent RAG como una tool para agentes.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
+from functools import cached_property
 from src.tools.checklist_tool import Tool, ToolDefinition
+from src.tools.single_flight import SingleFlight
 from src.rag.agent_based.retrieval import AgentRetrieval
 
 
@@ -23,10 +25,15 @@ class RetrievalAgentTool(Tool):
         """
         Args:
             agent_retrieval: Sistema de retrieval con agentes
+
+        PEDAGOGÍA:
+        - _inflight: búsquedas en curso por (query, top_k); una llamada
+          idéntica y concurrente espera la misma tarea (ver SingleFlight)
         """
         self.agent_retrieval = agent_retrieval
+        self._inflight = SingleFlight()
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
         """
         Define la tool para que el agente sepa usarla.
@@ -35,7 +42,7 @@ class RetrievalAgentTool(Tool):
         - Similar a RetrievalVectorTool pero menciona "evaluación inteligente"
         - El agente elegirá esta tool si necesita explicabilidad
         """
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="search_knowledge_base_agent",
             description="Busca información relevante en la base de conocimiento de procedimientos AFP usando evaluación inteligente por IA. Más transparente que la búsqueda vectorial, ya que explica por qué cada resultado es relevante.",
             parameters={
@@ -80,15 +87,39 @@ class RetrievalAgentTool(Tool):
             - query: Query original
         """
         # Limitar top_k para evitar excesiva lentitud
-        top_k = min(top_k, 5)
+        if top_k > 5:
+            top_k = 5
 
-        # Delegar a AgentRetrieval
-        result = await self.agent_retrieval.retrieve(
+        # Delegar a AgentRetrieval (una sola búsqueda por key concurrente)
+        key = (query, top_k)
+        result = await self._inflight.run(key, lambda: self.agent_retrieval.retrieve(
             query=query,
             k=top_k
-        )
+        ))
+
+        # Agregar query original (el resultado ya es una copia propia)
+        return {**result, "query": query}
 
-        # Agregar query original
-        result["query"] = query
+    async def execute_stream(
+        self,
+        query: str,
+        top_k: int = 3
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante de execute que entrega los chunks uno a uno.
+
+        PEDAGOGÍA:
+        - Agent RAG necesita evaluar y rankear TODOS los documentos antes de
+          conocer el top-k, así que no puede emitir antes de terminar; la
+          interfaz es la misma que en RetrievalVectorTool.execute_stream
+
+        Yields:
+            Dict con:
+            - delta: Un chunk con reasoning del LLM
+            - method: "agent_rag"
+            - query: Query original
+        """
+        result = await self.execute(query=query, top_k=top_k)
 
-        return result
+        for chunk in result.get("chunks", []):
+            yield {"delta": chunk, "method": result.get("method"), "query": query}
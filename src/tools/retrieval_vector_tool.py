@@ -4,11 +4,25 @@ Retrieval Tool usando Vector RAG
 Wrapper que expone el sistema Vector RAG como una tool para agentes.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Mapping
+from functools import cached_property
+from types import MappingProxyType
 from src.tools.checklist_tool import Tool, ToolDefinition
+from src.tools.single_flight import SingleFlight
 from src.rag.vector_based.retrieval import VectorRetrieval
 
 
+# Categorías de la base de conocimiento (enum del parámetro category)
+SEARCH_CATEGORIES = ("jubilacion", "afiliacion", "traspasos", "aportes", "devoluciones")
+
+# Filtro de solo lectura por categoría conocida, armado una sola vez.
+# MappingProxyType evita que un consumidor modifique el filtro compartido
+_CATEGORY_FILTERS: Dict[str, Mapping[str, Any]] = {
+    category: MappingProxyType({"category": category})
+    for category in SEARCH_CATEGORIES
+}
+
+
 class RetrievalVectorTool(Tool):
     """
     Tool de búsqueda semántica usando Vector RAG.
@@ -23,10 +37,15 @@ class RetrievalVectorTool(Tool):
         """
         Args:
             vector_retrieval: Sistema de retrieval vectorial
+
+        PEDAGOGÍA:
+        - _inflight: búsquedas en curso por (query, top_k, category); una
+          llamada idéntica y concurrente espera la misma tarea (ver SingleFlight)
         """
         self.vector_retrieval = vector_retrieval
+        self._inflight = SingleFlight()
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
         """
         Define la tool para que el agente sepa usarla.
@@ -36,7 +55,7 @@ class RetrievalVectorTool(Tool):
         - Mencionar que usa "base de conocimiento" es más comprensible que "vector search"
         - Los parámetros son simples: query + opciones
         """
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="search_knowledge_base",
             description="Busca información relevante en la base de conocimiento de procedimientos AFP usando búsqueda semántica vectorial. Úsala cuando necesites encontrar documentos o procedimientos relevantes para una consulta.",
             parameters={
@@ -54,7 +73,7 @@ class RetrievalVectorTool(Tool):
                     "category": {
                         "type": "string",
                         "description": "Filtrar por categoría específica (opcional): jubilacion, afiliacion, traspasos, aportes, devoluciones",
-                        "enum": ["jubilacion", "afiliacion", "traspasos", "aportes", "devoluciones"]
+                        "enum": list(SEARCH_CATEGORIES)
                     }
                 },
                 "required": ["query"]
@@ -87,21 +106,55 @@ class RetrievalVectorTool(Tool):
             - query: Query original (para contexto)
         """
         # Preparar filtros si hay categoría
-        filter_metadata = None
-        if category:
-            filter_metadata = {"category": category}
+        filter_metadata = self._category_filter(category) if category else None
 
-        # Delegar a VectorRetrieval
-        result = await self.vector_retrieval.retrieve(
+        # Delegar a VectorRetrieval (una sola búsqueda por key concurrente)
+        key = (query, top_k, category)
+        result = await self._inflight.run(key, lambda: self.vector_retrieval.retrieve(
             query=query,
             k=top_k,
             filter_metadata=filter_metadata
-        )
+        ))
+
+        # Agregar query original (el resultado ya es una copia propia)
+        return {**result, "query": query}
+
+    async def execute_stream(
+        self,
+        query: str,
+        top_k: int = 5,
+        category: str | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante de execute que entrega los chunks a medida que llegan.
+
+        Yields:
+            Dict con:
+            - delta: Un chunk con su cita (mismo formato que en execute)
+            - method: "vector_rag"
+            - query: Query original
+        """
+        filter_metadata = self._category_filter(category) if category else None
+
+        async for chunk in self.vector_retrieval.retrieve_stream(
+            query=query,
+            k=top_k,
+            filter_metadata=filter_metadata
+        ):
+            yield {"delta": chunk, "method": "vector_rag", "query": query}
 
-        # Agregar query original al resultado (útil para logging)
-        result["query"] = query
+    def _category_filter(self, category: str) -> Mapping[str, Any]:
+        """
+        Filtro {"category": category} para la búsqueda.
 
-        return result
+        Las categorías conocidas usan el filtro precalculado (compartido);
+        una categoría desconocida (texto libre del LLM o del caller) arma
+        su filtro en cada llamada, sin quedar guardada en memoria.
+        """
+        filter_metadata = _CATEGORY_FILTERS.get(category)
+        if filter_metadata is None:
+            filter_metadata = {"category": category}
+        return filter_metadata
 
     async def get_statistics(self) -> Dict[str, Any]:
         """
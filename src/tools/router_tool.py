@@ -11,10 +11,17 @@ PEDAGOGÍA:
 - Separación clara: LLM clasifica, reglas rutean
 """
 
-from typing import Any, Dict, Optional
+import asyncio
+import sys
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+from functools import cached_property, lru_cache
+from itertools import product
 
 from src.tools.checklist_tool import Tool, ToolDefinition
 from src.agents.reclamos.config import (
+    CATEGORY_NAMES,
+    CHANNELS,
     ROUTING_MATRIX,
     ESCALATION_RULES,
     DEPARTMENTS,
@@ -22,6 +29,121 @@ from src.agents.reclamos.config import (
 )
 
 
+# Para validar departamentos en O(1) (en config es una lista)
+_DEPARTMENTS_SET = frozenset(DEPARTMENTS)
+
+
+# Condiciones de las reglas de escalamiento, en orden de evaluación
+# (las acciones están en RouterTool._apply_escalation_rules)
+_RULE_CONDITIONS = (
+    ("priority_critical",
+     lambda category, priority, channel: priority == "critical"),
+    ("legal_critical",
+     lambda category, priority, channel: (
+         category == "legal" and priority in ["critical", "high"]
+     )),
+    ("fraude_always",
+     lambda category, priority, channel: category == "fraude"),
+    ("presencial_critical",
+     lambda category, priority, channel: (
+         channel == "presencial" and priority == "critical"
+     )),
+)
+
+
+# Bit de cada regla en la máscara de reglas aplicadas (bit i = regla i)
+_PRIORITY_CRITICAL, _LEGAL_CRITICAL, _FRAUDE_ALWAYS, _PRESENCIAL_CRITICAL = (
+    1 << i for i in range(len(_RULE_CONDITIONS))
+)
+
+
+def _matching_rules(category: str, priority: str, channel: str) -> int:
+    """Máscara de bits de las reglas que aplican."""
+    mask = 0
+    for i, (_, condition) in enumerate(_RULE_CONDITIONS):
+        if condition(category, priority, channel):
+            mask |= 1 << i
+    return mask
+
+
+# Máscara → reglas aplicadas (en orden de evaluación) y su etiqueta unida.
+# Son a lo más 16 combinaciones: se arman (e internan) una vez, no en cada routing
+_APPLIED_RULES_BY_MASK: Dict[int, Tuple[str, ...]] = {
+    mask: tuple(
+        rule_id for i, (rule_id, _) in enumerate(_RULE_CONDITIONS)
+        if mask & (1 << i)
+    )
+    for mask in range(1 << len(_RULE_CONDITIONS))
+}
+_RULE_STRING_BY_MASK: Dict[int, str] = {
+    mask: sys.intern("+".join(rule_ids))
+    for mask, rule_ids in _APPLIED_RULES_BY_MASK.items()
+}
+
+
+# Índice precalculado: (category, priority, channel) → máscara de reglas.
+# Se cachea la decisión, no el routing; combinaciones desconocidas se evalúan
+_RULE_INDEX: Dict[Tuple[str, str, str], int] = {
+    key: _matching_rules(*key)
+    for key in product(
+        set(CATEGORY_NAMES) | set(ROUTING_MATRIX),
+        PRIORITY_LEVELS,
+        CHANNELS
+    )
+}
+
+
+@dataclass(frozen=True, slots=True)
+class RoutingDecision:
+    """
+    Decisión de routing inmutable (lo que se cachea por combinación).
+
+    PEDAGOGÍA:
+    - slots: sin __dict__ por instancia, bastante más liviano que un dict
+    - frozen: la misma instancia se comparte entre llamadas sin riesgo de
+      que un caller la modifique; las reglas usan dataclasses.replace
+    - Los campos opcionales (None) solo existen cuando alguna regla los fija
+    - as_dict() arma el dict público (JSON, tool calls) bajo demanda
+    """
+    department: str
+    queue: str
+    backup_department: Optional[str]
+    requires_verification: bool
+    escalated: bool
+    escalation_reason: Optional[str]
+    routing_rule: str
+    applied_rules: Tuple[str, ...] = ()
+    requires_security_protocol: Optional[bool] = None
+    additional_notifications: Optional[Tuple[str, ...]] = None
+    immediate_attention: Optional[bool] = None
+    notify_supervisor_agencia: Optional[bool] = None
+    sla_override_hours: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Routing como dict nuevo (el caller puede modificarlo)."""
+        routing = {
+            "department": self.department,
+            "queue": self.queue,
+            "backup_department": self.backup_department,
+            "requires_verification": self.requires_verification,
+            "escalated": self.escalated,
+            "escalation_reason": self.escalation_reason,
+            "routing_rule": self.routing_rule,
+        }
+        if self.requires_security_protocol is not None:
+            routing["requires_security_protocol"] = self.requires_security_protocol
+        if self.additional_notifications is not None:
+            routing["additional_notifications"] = list(self.additional_notifications)
+        if self.immediate_attention is not None:
+            routing["immediate_attention"] = self.immediate_attention
+        if self.notify_supervisor_agencia is not None:
+            routing["notify_supervisor_agencia"] = self.notify_supervisor_agencia
+        if self.sla_override_hours is not None:
+            routing["sla_override_hours"] = self.sla_override_hours
+        routing["applied_rules"] = list(self.applied_rules)
+        return routing
+
+
 class RouterTool(Tool):
     """
     Determina el departamento destino para un reclamo.
@@ -56,15 +178,48 @@ class RouterTool(Tool):
         PEDAGOGÍA:
         - Permite override de la matriz para testing
         - Facilita diferentes configuraciones por ambiente
+        - El routing es una función pura de (category, priority, channel):
+          se memoiza por instancia (cada instancia puede tener otra matriz)
         """
         self.routing_matrix = routing_matrix or ROUTING_MATRIX
+        self._routing_matrix_lc = {
+            key.lower(): value for key, value in self.routing_matrix.items()
+        }
+
+        # Routing sin escalamiento por categoría: se arma una vez y se
+        # comparte (inmutable); las reglas derivan una nueva decisión.
+        # Las etiquetas routing_rule son un set chico y fijo: se internan
+        self._base_templates = {
+            category: RoutingDecision(
+                department=routing_config["department"],
+                queue=routing_config["queue"],
+                backup_department=routing_config.get("backup_department"),
+                requires_verification=routing_config.get(
+                    "requires_verification", False
+                ),
+                escalated=False,
+                escalation_reason=None,
+                routing_rule=sys.intern(f"matrix:{category}")
+            )
+            for category, routing_config in self._routing_matrix_lc.items()
+        }
+        self._fallback_template = RoutingDecision(
+            department="servicio_cliente",
+            queue="general",
+            backup_department=None,
+            requires_verification=False,
+            escalated=False,
+            escalation_reason=None,
+            routing_rule=sys.intern("fallback:unknown_category")
+        )
+        self._route_cached = lru_cache(maxsize=1024)(self._route)
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
         """
         Define la tool para el sistema.
         """
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="route_claim",
             description=(
                 "Determina el departamento y cola destino para un reclamo "
@@ -116,64 +271,109 @@ class RouterTool(Tool):
         PEDAGOGÍA:
         - El método es async para consistencia con otras tools
         - Pero la lógica es síncrona (no hay I/O)
+        - Mismo input → mismo routing: se calcula una vez y se cachea
+        """
+        # La decisión cacheada es inmutable; el caller recibe un dict propio
+        return self._route_cached(category, priority, channel).as_dict()
+
+    async def execute_batch(
+        self,
+        categories: List[str],
+        priorities: List[str],
+        channels: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Determina el routing de muchos reclamos (reprocesos, cargas masivas).
+
+        Args:
+            categories: Categoría de cada reclamo
+            priorities: Prioridad de cada reclamo (misma longitud)
+            channels: Canal de cada reclamo (default "web" para todos)
+
+        Returns:
+            Lista de routings en el mismo orden que la entrada
+
+        PEDAGOGÍA:
+        - Un solo await para N reclamos, en vez de N awaits de execute
+        - Las combinaciones (category, priority, channel) son pocas: casi
+          todos los reclamos resuelven con un lookup en la caché de _route
+        """
+        if channels is None:
+            channels = ["web"] * len(categories)
+
+        route = self._route_cached
+        return [
+            route(category, priority, channel).as_dict()
+            for category, priority, channel in zip(
+                categories, priorities, channels, strict=True
+            )
+        ]
+
+    async def execute_many(
+        self,
+        items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Determina el routing de varios reclamos dados como kwargs de execute.
+
+        Args:
+            items: Lista de dicts con category, priority y (opcional) channel
+
+        Returns:
+            Lista de routings en el mismo orden que la entrada
+
+        PEDAGOGÍA:
+        - asyncio.gather: un solo await para todos los reclamos
+        - El routing en sí no hace I/O; gather sirve cuando execute se
+          compone con tools que sí lo hacen (DB, notificaciones)
+        - Para routing puro de muchos reclamos, execute_batch es más barato
+          (no crea una tarea por reclamo)
+        """
+        return list(await asyncio.gather(
+            *(self.execute(**item) for item in items)
+        ))
+
+    def _route(self, category: str, priority: str, channel: str) -> RoutingDecision:
+        """
+        Calcula el routing completo (matriz + reglas de escalamiento).
+
+        Solo se ejecuta en cache miss (ver _route_cached en __init__).
         """
         # Obtener routing base de la matriz
         base_routing = self._get_base_routing(category)
 
         # Aplicar reglas de escalamiento
-        final_routing = self._apply_escalation_rules(
+        return self._apply_escalation_rules(
             base_routing=base_routing,
             category=category,
             priority=priority,
             channel=channel
         )
 
-        return final_routing
-
-    def _get_base_routing(self, category: str) -> Dict[str, Any]:
+    def _get_base_routing(self, category: str) -> RoutingDecision:
         """
         Obtiene el routing base de la matriz de configuración.
 
         PEDAGOGÍA:
-        - Lookup simple en diccionario
+        - Lookup simple en diccionario (templates armados en __init__)
         - Fallback a servicio_cliente si categoría no existe
+        - Retorna el template compartido (inmutable, no requiere copia)
         """
-        # Normalizar categoría
-        category = category.lower()
-
-        # Buscar en matriz
-        if category in self.routing_matrix:
-            routing_config = self.routing_matrix[category]
-            return {
-                "department": routing_config["department"],
-                "queue": routing_config["queue"],
-                "backup_department": routing_config.get("backup_department"),
-                "requires_verification": routing_config.get(
-                    "requires_verification", False
-                ),
-                "escalated": False,
-                "escalation_reason": None,
-                "routing_rule": f"matrix:{category}"
-            }
-        else:
-            # Fallback
-            return {
-                "department": "servicio_cliente",
-                "queue": "general",
-                "backup_department": None,
-                "requires_verification": False,
-                "escalated": False,
-                "escalation_reason": None,
-                "routing_rule": "fallback:unknown_category"
-            }
+        # Buscar en matriz; normalizar solo si no viene ya en minúsculas
+        template = self._base_templates.get(category)
+        if template is None:
+            template = self._base_templates.get(
+                category.lower(), self._fallback_template
+            )
+        return template
 
     def _apply_escalation_rules(
         self,
-        base_routing: Dict[str, Any],
+        base_routing: RoutingDecision,
         category: str,
         priority: str,
         channel: str
-    ) -> Dict[str, Any]:
+    ) -> RoutingDecision:
         """
         Aplica reglas de escalamiento sobre el routing base.
 
@@ -181,52 +381,65 @@ class RouterTool(Tool):
         - Las reglas se evalúan en orden de prioridad
         - Múltiples reglas pueden aplicar
         - Cada regla puede modificar el routing
+        - Sin reglas aplicables se retorna el template tal cual (sin copia)
+        - Qué reglas aplican sale de _RULE_INDEX (un lookup, sin if's) como
+          máscara de bits; applied_rules y la etiqueta salen precalculadas
+        - El resultado es una decisión nueva (dataclasses.replace)
         """
-        routing = base_routing.copy()
-        applied_rules = []
+        applied_mask = _RULE_INDEX.get((category, priority, channel))
+        if applied_mask is None:
+            applied_mask = _matching_rules(category, priority, channel)
+        if not applied_mask:
+            return base_routing
+
+        department = base_routing.department
+        queue = base_routing.queue
+        escalated = base_routing.escalated
+        escalation_reason = base_routing.escalation_reason
+        extra_fields: Dict[str, Any] = {}
 
         # Regla 1: Prioridad crítica → escalamiento automático
-        if priority == "critical":
-            routing["escalated"] = True
-            routing["queue"] = f"{routing['queue']}_supervisor"
-            routing["escalation_reason"] = "Prioridad crítica requiere supervisor"
-            applied_rules.append("priority_critical")
+        if applied_mask & _PRIORITY_CRITICAL:
+            escalated = True
+            queue = f"{queue}_supervisor"
+            escalation_reason = "Prioridad crítica requiere supervisor"
 
         # Regla 2: Legal con prioridad alta o crítica → gerencia legal
-        if category == "legal" and priority in ["critical", "high"]:
-            routing["department"] = "legal"
-            routing["queue"] = "gerencia_legal"
-            routing["escalated"] = True
-            existing_reason = routing.get("escalation_reason") or ""
-            routing["escalation_reason"] = (
-                existing_reason + " Caso legal escalado a gerencia."
+        if applied_mask & _LEGAL_CRITICAL:
+            department = "legal"
+            queue = "gerencia_legal"
+            escalated = True
+            escalation_reason = (
+                (escalation_reason or "") + " Caso legal escalado a gerencia."
             ).strip()
-            applied_rules.append("legal_critical")
 
         # Regla 3: Fraude → siempre protocolo de seguridad
-        if category == "fraude":
-            routing["escalated"] = True
-            routing["requires_security_protocol"] = True
-            routing["additional_notifications"] = ["antifraude", "seguridad"]
-            if not routing.get("escalation_reason"):
-                routing["escalation_reason"] = "Caso de fraude requiere protocolo de seguridad"
-            applied_rules.append("fraude_always")
+        if applied_mask & _FRAUDE_ALWAYS:
+            escalated = True
+            extra_fields["requires_security_protocol"] = True
+            extra_fields["additional_notifications"] = ("antifraude", "seguridad")
+            if not escalation_reason:
+                escalation_reason = "Caso de fraude requiere protocolo de seguridad"
 
         # Regla 4: Canal presencial + crítico → atención inmediata
-        if channel == "presencial" and priority == "critical":
-            routing["immediate_attention"] = True
-            routing["notify_supervisor_agencia"] = True
-            routing["sla_override_hours"] = 1
-            applied_rules.append("presencial_critical")
+        if applied_mask & _PRESENCIAL_CRITICAL:
+            extra_fields["immediate_attention"] = True
+            extra_fields["notify_supervisor_agencia"] = True
+            extra_fields["sla_override_hours"] = 1
 
         # Registrar reglas aplicadas
-        routing["applied_rules"] = applied_rules
-        if applied_rules:
-            routing["routing_rule"] = (
-                f"{base_routing['routing_rule']}+{'+'.join(applied_rules)}"
-            )
-
-        return routing
+        return replace(
+            base_routing,
+            department=department,
+            queue=queue,
+            escalated=escalated,
+            escalation_reason=escalation_reason,
+            routing_rule=sys.intern(
+                f"{base_routing.routing_rule}+{_RULE_STRING_BY_MASK[applied_mask]}"
+            ),
+            applied_rules=_APPLIED_RULES_BY_MASK[applied_mask],
+            **extra_fields
+        )
 
     def get_available_departments(self) -> list:
         """
@@ -250,7 +463,7 @@ class RouterTool(Tool):
             if field not in routing:
                 return False
 
-        if routing["department"] not in DEPARTMENTS:
+        if routing["department"] not in _DEPARTMENTS_SET:
             return False
 
         return True
@@ -0,0 +1,78 @@
+"""
+Single-flight - Coalesce llamadas concurrentes idénticas
+
+Helper compartido por las tools de retrieval: mientras una búsqueda está
+en curso, otra llamada con la misma key espera esa misma tarea en vez de
+repetir la búsqueda en el backend.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+import asyncio
+
+
+class SingleFlight:
+    """
+    Mapa de búsquedas en curso: una sola tarea por key concurrente.
+
+    PEDAGOGÍA:
+    - La tarea se crea con la primera llamada y se olvida al terminar: no
+      es un cache, una llamada posterior vuelve a consultar el backend
+    - asyncio.shield: si un caller se cancela, los demás siguen esperando
+    - Cada caller recibe su propia copia del dict y de sus listas (chunks):
+      si uno las modifica, no afecta a los demás
+    - Si todos los callers se van antes de que termine, el error de la
+      tarea se lee igual, para que asyncio no lo reporte como "never retrieved"
+    """
+
+    def __init__(self):
+        # key -> [tarea, callers esperando]
+        self._inflight: Dict[Hashable, List[Any]] = {}
+
+    async def run(
+        self,
+        key: Hashable,
+        start: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Espera la tarea en curso para key, o la crea con start().
+
+        Args:
+            key: Identifica llamadas equivalentes (p. ej. (query, top_k))
+            start: Crea la corrutina de búsqueda; solo se llama si no hay
+                   una tarea en curso para key
+
+        Returns:
+            Copia del resultado (dict con sus listas copiadas)
+        """
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(start())
+            entry = [task, 0]
+            self._inflight[key] = entry
+            task.add_done_callback(lambda _: self._forget(key, entry))
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # Nadie más la espera: leer su error cuando termine
+                task.add_done_callback(_retrieve_exception)
+
+        return {
+            name: list(value) if isinstance(value, list) else value
+            for name, value in result.items()
+        }
+
+    def _forget(self, key: Hashable, entry: List[Any]) -> None:
+        """Saca la tarea terminada del mapa (si no fue reemplazada)."""
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    """Marca el error de la tarea como leído (nadie más lo va a esperar)."""
+    if not task.cancelled():
+        task.exception()
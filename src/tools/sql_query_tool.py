@@ -6,7 +6,10 @@ a la base de datos con prevención de SQL injection.
 """
 
 import re
-from typing import Any, Dict, List, Tuple
+from collections import OrderedDict
+import asyncpg
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from functools import cached_property, lru_cache
 from src.tools.checklist_tool import Tool, ToolDefinition
 from src.agents.buscador.config import (
     ALLOWED_TABLES,
@@ -16,12 +19,104 @@ from src.agents.buscador.config import (
 )
 
 
+def _keyword_alternative(keyword: str) -> str:
+    """
+    Alternativa regex para un keyword: palabra completa si es alfanumérico.
+
+    Los tokens de símbolos ("--", "/*") no tienen límites de palabra (\\b),
+    así que se buscan tal cual.
+    """
+    escaped = re.escape(keyword)
+    return rf"\b{escaped}\b" if keyword.replace("_", "").isalnum() else escaped
+
+
+def _alternation(words) -> str:
+    """Une un set de keywords en una alternativa regex (a|b|...)."""
+    # Orden determinístico (más largos primero) para mensajes de error estables
+    ordered = sorted(words, key=lambda w: (-len(w), w))
+    return "|".join(_keyword_alternative(w) for w in ordered)
+
+
+# La query debe empezar con SELECT (ignorando espacios y mayúsculas)
+_SELECT_RE = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+
+# La query ya trae LIMIT (palabra completa, cualquier capitalización)
+_LIMIT_RE = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+# Literal de string SQL: '...' con '' como comilla escapada
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+
+# Errores del servidor que puede causar un template con $1, $2...: sintaxis
+# que el tokenizer simple rompió o un parámetro sin tipo inferible
+_TEMPLATE_ERRORS = (
+    asyncpg.PostgresSyntaxError,
+    asyncpg.exceptions.IndeterminateDatatypeError,
+)
+
+# Tipos de parámetro a los que asyncpg puede pasar un str tal cual
+_TEXT_PARAM_TYPES = frozenset({"text", "varchar", "bpchar", "char", "name", "unknown"})
+
+# Keywords prohibidos y tablas permitidas en un solo autómata: una pasada
+# sobre la query encuentra ambos (el grupo que matcheó dice cuál es)
+_SQL_TOKEN_RE = re.compile(
+    f"(?P<forbidden>{_alternation(FORBIDDEN_SQL_KEYWORDS)})"
+    f"|(?P<table>{_alternation(ALLOWED_TABLES)})",
+    re.IGNORECASE
+)
+
+
+# RUT chileno con puntos entre comillas: 'XX.XXX.XXX-X'
+_RUT_RE = re.compile(r"'(\d{1,2}\.\d{3}\.\d{3}-[\dkK])'")
+
+
 def normalize_rut(rut: str) -> str:
     """
     Normaliza un RUT chileno quitando puntos.
     Ejemplo: '12.345.678-9' -> '12345678-9'
     """
-    return rut.replace(".", "")
+    # Un RUT ya normalizado se retorna tal cual, sin crear otro string
+    return rut.replace(".", "") if "." in rut else rut
+
+
+def _replace_rut(match: re.Match) -> str:
+    """Reemplazo para _RUT_RE.sub: el RUT normalizado, entre comillas."""
+    return f"'{normalize_rut(match.group(1))}'"
+
+
+def _is_parameterization_error(error: Exception) -> bool:
+    """
+    Indica si el error lo causó pasar los literales como parámetros.
+
+    - Template que no prepara (_TEMPLATE_ERRORS)
+    - DataError del cliente: asyncpg no pudo codificar un str para un
+      parámetro de otro tipo (fecha, número); se lanza antes de enviar la
+      query, con el error del codec como causa. Los DataError del servidor
+      (SQLSTATE clase 22: división por cero, fecha fuera de rango...) no
+      la traen: son errores reales de la query y se propagan
+
+    Cualquier otro error (timeout, conexión caída) no dice nada del template.
+    """
+    if isinstance(error, _TEMPLATE_ERRORS):
+        return True
+    return isinstance(error, asyncpg.DataError) and error.__cause__ is not None
+
+
+def _parameterize(query: str) -> Tuple[str, List[str]]:
+    """
+    Separa los literales de string de la query: (template, params).
+
+    Ejemplo: "... WHERE rut = '12345678-9'" -> ("... WHERE rut = $1", ["12345678-9"])
+
+    Queries con el mismo template (p. ej. distinto RUT) comparten así el
+    prepared statement que asyncpg cachea por conexión según el texto SQL.
+    """
+    params: List[str] = []
+
+    def to_placeholder(match: re.Match) -> str:
+        params.append(match.group(0)[1:-1].replace("''", "'"))
+        return f"${len(params)}"
+
+    return _STRING_LITERAL_RE.sub(to_placeholder, query), params
 
 
 class SQLValidator:
@@ -34,24 +129,21 @@ class SQLValidator:
         Returns:
             (is_safe, error_message)
         """
-        query_upper = query.upper().strip()
+        # Todas las búsquedas son case-insensitive sobre la query original:
+        # no se crean copias en mayúsculas/minúsculas
 
         # 1. Solo SELECT permitido
-        if not query_upper.startswith("SELECT"):
+        if not _SELECT_RE.match(query):
             return False, "Solo consultas SELECT permitidas"
 
-        # 2. Sin keywords peligrosos
-        for keyword in FORBIDDEN_SQL_KEYWORDS:
-            if keyword in query_upper:
-                return False, f"Keyword prohibido: {keyword}"
-
+        # 2. Sin keywords peligrosos (palabra completa: created_at no es CREATE)
         # 3. Verificar que usa tablas permitidas
-        query_lower = query.lower()
+        # Ambos chequeos en una sola pasada sobre la query
         has_valid_table = False
-        for table in ALLOWED_TABLES:
-            if table in query_lower:
-                has_valid_table = True
-                break
+        for match in _SQL_TOKEN_RE.finditer(query):
+            if match.lastgroup == "forbidden":
+                return False, f"Keyword prohibido: {match.group().upper()}"
+            has_valid_table = True
 
         if not has_valid_table:
             return False, f"Tabla no permitida. Tablas válidas: {ALLOWED_TABLES}"
@@ -68,8 +160,17 @@ class SQLQueryTool(Tool):
     - Whitelist de tablas y columnas
     - Prevención de SQL injection
     - Límite de resultados
+    - Literales como parámetros: un prepared statement por forma de query
+    - Nunca se retornan más de MAX_SQL_ROWS filas (LIMIT agregado o cursor);
+      si se cortó un LIMIT propio más grande, el resultado trae truncated=True
     """
 
+    # Máximo de templates recordados como "no parametrizables"
+    _RAW_ONLY_CACHE_SIZE = 256
+
+    # Máximo de queries recordadas ya normalizadas/validadas
+    _QUERY_CACHE_SIZE = 256
+
     def __init__(self, db_pool):
         """
         Args:
@@ -77,11 +178,19 @@ class SQLQueryTool(Tool):
         """
         self.db_pool = db_pool
         self.validator = SQLValidator()
+        # Templates que fallaron con parámetros (p. ej. un literal de fecha
+        # que Postgres tipa como date): se ejecutan con la query original
+        self._raw_only: OrderedDict[str, None] = OrderedDict()
+        # El agente repite las mismas queries: normalizar + validar + LIMIT
+        # es una función pura de la query, se memoiza por instancia
+        self._query_cache = lru_cache(maxsize=self._QUERY_CACHE_SIZE)(
+            self._compile_query
+        )
 
-    @property
+    @cached_property
     def definition(self) -> ToolDefinition:
         tables_info = ", ".join(ALLOWED_TABLES)
-        return ToolDefinition(
+        return ToolDefinition.model_construct(
             name="sql_query",
             description=f"Ejecuta consultas SQL en la base de datos de AFP Integra. Solo SELECT permitido. Tablas disponibles: {tables_info}",
             parameters={
@@ -101,15 +210,11 @@ class SQLQueryTool(Tool):
         Normaliza RUTs chilenos en la query (quita puntos).
         Detecta patrones como '12.345.678-9' y los convierte a '12345678-9'.
         """
-        # Patrón para RUT chileno con puntos: XX.XXX.XXX-X
-        rut_pattern = r"'(\d{1,2}\.\d{3}\.\d{3}-[\dkK])'"
+        # Sin puntos no puede haber RUTs con puntos: se evita la regex
+        if "." not in query:
+            return query
 
-        def replace_rut(match):
-            rut_with_dots = match.group(1)
-            rut_normalized = normalize_rut(rut_with_dots)
-            return f"'{rut_normalized}'"
-
-        return re.sub(rut_pattern, replace_rut, query)
+        return _RUT_RE.sub(_replace_rut, query)
 
     async def execute(self, query: str) -> Dict[str, Any]:
         """
@@ -119,13 +224,12 @@ class SQLQueryTool(Tool):
             query: Consulta SQL (solo SELECT)
 
         Returns:
-            Dict con results y count, o error si la query es inválida
+            Dict con results, count y truncated (True si la query traía un
+            LIMIT mayor a MAX_SQL_ROWS y había más filas), o error si la
+            query es inválida
         """
-        # Normalizar RUTs en la query (quitar puntos)
-        query = self._normalize_ruts_in_query(query)
-
-        # Validar query
-        is_safe, error = self.validator.validate(query)
+        # Normalizar, validar y agregar LIMIT (cacheado por query)
+        query, is_safe, error, limit_added = self._query_cache(query)
         if not is_safe:
             return {
                 "error": error,
@@ -134,21 +238,32 @@ class SQLQueryTool(Tool):
                 "count": 0
             }
 
-        # Agregar LIMIT si no tiene
-        query_upper = query.upper()
-        if "LIMIT" not in query_upper:
-            query = f"{query.rstrip(';')} LIMIT {MAX_SQL_ROWS}"
-
         # Ejecutar query
         try:
             async with self.db_pool.acquire() as conn:
-                rows = await conn.fetch(query)
+                if limit_added:
+                    rows = await self._fetch(conn, query)
+                else:
+                    # LIMIT propio (puede superar MAX_SQL_ROWS): leer con cursor
+                    rows = await self._fetch_capped(conn, query)
 
-            results = [dict(row) for row in rows]
+            # _fetch_capped trae una fila de más para saber si hubo corte
+            truncated = len(rows) > MAX_SQL_ROWS
+            if truncated:
+                rows = rows[:MAX_SQL_ROWS]
+
+            # Nombres de columna una sola vez: cada fila reutiliza los mismos
+            # strings de clave (dict(row) los pide al Record fila por fila)
+            if rows:
+                columns = tuple(rows[0].keys())
+                results = [dict(zip(columns, row)) for row in rows]
+            else:
+                results = []
             return {
                 "query": query,
                 "results": results,
-                "count": len(results)
+                "count": len(results),
+                "truncated": truncated
             }
 
         except Exception as e:
@@ -158,3 +273,146 @@ class SQLQueryTool(Tool):
                 "results": [],
                 "count": 0
             }
+
+    def _compile_query(self, query: str) -> Tuple[str, bool, str, bool]:
+        """
+        Prepara la query para ejecutarse: (query_final, is_safe, error, limit_added).
+
+        Solo se ejecuta en cache miss (ver _query_cache en __init__).
+        Si la query no es segura, query_final es la query normalizada.
+        """
+        # Normalizar RUTs en la query (quitar puntos)
+        query = self._normalize_ruts_in_query(query)
+
+        # Validar query
+        is_safe, error = self.validator.validate(query)
+        if not is_safe:
+            return query, False, error, False
+
+        # Agregar LIMIT si no tiene
+        if _LIMIT_RE.search(query):
+            return query, True, error, False
+
+        return f"{query.rstrip(';')} LIMIT {MAX_SQL_ROWS}", True, error, True
+
+    async def execute_stream(
+        self,
+        query: str,
+        batch_size: int = 50
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante de execute que entrega las filas de a una.
+
+        Las filas se leen del cursor en lotes de batch_size: el consumidor
+        puede cortar (break) apenas tenga lo que necesita, sin que se haya
+        traído el resto del resultado.
+
+        Yields:
+            Un dict por fila (máximo MAX_SQL_ROWS), o un único
+            {"error": ..., "query": ...} si la query es inválida o falla
+        """
+        query, is_safe, error, _ = self._query_cache(query)
+        if not is_safe:
+            yield {"error": error, "query": query}
+            return
+
+        try:
+            async with self.db_pool.acquire() as conn:
+                statement, params = await self._prepare(conn, query)
+                async with conn.transaction():
+                    cursor = await statement.cursor(*params)
+                    columns = None
+                    remaining = MAX_SQL_ROWS
+                    while remaining > 0:
+                        rows = await cursor.fetch(min(batch_size, remaining))
+                        if not rows:
+                            break
+                        if columns is None:
+                            columns = tuple(rows[0].keys())
+                        remaining -= len(rows)
+                        for row in rows:
+                            yield dict(zip(columns, row))
+
+        except Exception as e:
+            yield {"error": str(e), "query": query}
+
+    async def _fetch(self, conn, query: str) -> List[Any]:
+        """
+        Ejecuta la query con sus literales de string como parámetros.
+
+        PEDAGOGÍA:
+        - asyncpg cachea prepared statements por conexión, con el texto SQL
+          como clave: con literales inline cada RUT distinto es un statement
+          nuevo (parse + plan); con $1, $2... se reutiliza el mismo
+        - Si el template falla con parámetros (tipos que Postgres infiere
+          distinto a str, sintaxis que el tokenizer simple no entiende) se
+          usa la query original y se recuerda para no reintentar; otros
+          errores (timeout, conexión, errores de datos del servidor) se
+          propagan sin marcar el template (ver _is_parameterization_error)
+        """
+        if "$" not in query and "'" in query:
+            template, params = _parameterize(query)
+            if template not in self._raw_only:
+                try:
+                    return await conn.fetch(template, *params)
+                except asyncpg.PostgresError as e:
+                    if not _is_parameterization_error(e):
+                        raise
+                    self._mark_raw_only(template)
+
+        return await conn.fetch(query)
+
+    async def _fetch_capped(self, conn, query: str) -> List[Any]:
+        """
+        Lee a lo más MAX_SQL_ROWS + 1 filas de una query que trae su propio LIMIT.
+
+        PEDAGOGÍA:
+        - Cursor de servidor: aunque el LIMIT sea mayor, en memoria nunca
+          quedan más de MAX_SQL_ROWS + 1 filas
+        - La fila extra solo indica que el resultado se cortó: execute la
+          descarta y marca truncated, para que el agente no reporte datos
+          parciales como completos
+        - asyncpg exige una transacción para usar cursores; el statement se
+          prepara antes de abrirla (ver _prepare)
+        - Las queries sin LIMIT propio no pasan por aquí: el LIMIT agregado
+          ya las acota y conn.fetch es un solo round-trip
+        """
+        statement, params = await self._prepare(conn, query)
+        async with conn.transaction():
+            cursor = await statement.cursor(*params)
+            return await cursor.fetch(MAX_SQL_ROWS + 1)
+
+    async def _prepare(self, conn, query: str) -> Tuple[Any, List[str]]:
+        """
+        Prepara la query (parametrizada si se puede): (statement, params).
+
+        PEDAGOGÍA:
+        - Se llama fuera de la transacción: si el template no prepara, el
+          error no aborta nada y se cae a la query original, sin savepoints
+        - Los parámetros van como str: el template sirve solo si Postgres
+          tipa todos sus parámetros como texto
+        """
+        if "$" not in query and "'" in query:
+            template, params = _parameterize(query)
+            if template not in self._raw_only:
+                try:
+                    statement = await conn.prepare(template)
+                except asyncpg.PostgresError as e:
+                    if not _is_parameterization_error(e):
+                        raise
+                    self._mark_raw_only(template)
+                else:
+                    if all(
+                        param.name in _TEXT_PARAM_TYPES
+                        for param in statement.get_parameters()
+                    ):
+                        return statement, params
+                    self._mark_raw_only(template)
+
+        return await conn.prepare(query), []
+
+    def _mark_raw_only(self, template: str) -> None:
+        """Recuerda un template que no se puede ejecutar con parámetros."""
+        self._raw_only[template] = None
+        if len(self._raw_only) > self._RAW_ONLY_CACHE_SIZE:
+            self._raw_only.popitem(last=False)
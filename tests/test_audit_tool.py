@@ -0,0 +1,116 @@
+"""
+Tests de AuditTool: persistencia en archivo JSONL y ciclo de vida del fd.
+"""
+
+import asyncio
+import gc
+import json
+import os
+
+import pytest
+
+from src.tools.audit_tool import AuditTool
+
+
+@pytest.fixture
+def log_path(tmp_path) -> str:
+    return str(tmp_path / "audit.jsonl")
+
+
+def read_entries(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_record_outside_event_loop_writes_synchronously(log_path):
+    tool = AuditTool(log_to_file=True, log_file_path=log_path)
+
+    result = tool.record("classify_and_route", "CLM-1", {"category": "atencion"})
+
+    assert result["logged"] is True
+    assert [e["trace_id"] for e in read_entries(log_path)] == [result["trace_id"]]
+
+
+def test_record_across_two_event_loops(log_path):
+    tool = AuditTool(log_to_file=True, log_file_path=log_path)
+
+    async def record_without_flush(entity_id):
+        return tool.record("classify_and_route", entity_id, {"n": 1})["trace_id"]
+
+    async def record_and_flush(entity_id):
+        trace_id = tool.record("classify_and_route", entity_id, {"n": 2})["trace_id"]
+        await tool.flush()
+        return trace_id
+
+    # El primer loop se cierra con el entry todavía en la cola
+    first = asyncio.run(record_without_flush("CLM-1"))
+    second = asyncio.run(record_and_flush("CLM-2"))
+
+    assert [e["trace_id"] for e in read_entries(log_path)] == [first, second]
+
+
+def test_flush_persists_entries_in_record_order(log_path):
+    tool = AuditTool(log_to_file=True, log_file_path=log_path)
+
+    async def main():
+        trace_ids = [
+            tool.record("classify_and_route", f"CLM-{i}", {"n": i})["trace_id"]
+            for i in range(250)
+        ]
+        await tool.flush()
+        return trace_ids
+
+    trace_ids = asyncio.run(main())
+
+    assert [e["trace_id"] for e in read_entries(log_path)] == trace_ids
+
+
+def test_query_logs_after_rotation_reads_the_new_file(log_path):
+    tool = AuditTool(log_to_file=True, log_file_path=log_path)
+
+    async def main():
+        tool.record("classify_and_route", "CLM-OLD", {"n": 1})
+        await tool.flush()
+        os.rename(log_path, log_path + ".1")
+
+        tool.record("classify_and_route", "CLM-NEW", {"n": 2})
+        return await tool.query_logs()
+
+    entries = asyncio.run(main())
+
+    assert [e["entity_id"] for e in entries] == ["CLM-NEW"]
+    assert [e["entity_id"] for e in read_entries(log_path + ".1")] == ["CLM-OLD"]
+
+
+def test_unserializable_decision_does_not_raise(log_path):
+    tool = AuditTool(log_to_file=True, log_file_path=log_path)
+    cyclic = {"a": 1}
+    cyclic["self"] = cyclic
+
+    bad = tool.record("classify_and_route", "CLM-1", {"scores": {("a", "b"): 1}})
+    good = tool.record("classify_and_route", "CLM-2", {"cyclic": cyclic})
+
+    assert bad["logged"] is True
+    entries = read_entries(log_path)
+    assert [e["trace_id"] for e in entries] == [good["trace_id"]]
+    assert entries[0]["decision"]["cyclic"]["self"] == "[CIRCULAR]"
+
+
+def open_fd_count() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="requiere /proc")
+def test_discarded_instances_do_not_leak_file_descriptors(log_path):
+    gc.collect()
+    before = open_fd_count()
+
+    for i in range(50):
+        tool = AuditTool(log_to_file=True, log_file_path=log_path)
+        tool.record("classify_and_route", f"CLM-{i}", {"category": "atencion"})
+        del tool
+    gc.collect()
+
+    assert open_fd_count() <= before
+    with open(log_path) as f:
+        assert len(f.readlines()) == 50
@@ -0,0 +1,53 @@
+"""
+Tests de ReadDocumentTool con un directorio temporal.
+
+Cubren el índice nombre -> ruta (_ensure_index): con un nombre repetido en
+varios subdirectorios debe resolverse al mismo archivo que encontraba el
+recorrido original con os.walk.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from src.tools.document_search_tool import ReadDocumentTool
+
+
+def first_walk_match(base: Path, filename: str) -> Path:
+    """El archivo que elegía el recorrido original (primer match de os.walk)."""
+    for root, dirs, files in os.walk(base):
+        if filename in files:
+            return Path(root) / filename
+    raise AssertionError(f"{filename} no existe en {base}")
+
+
+@pytest.fixture
+def docs(tmp_path: Path) -> Path:
+    for relative in ("a/dup.txt", "c/dup.txt", "b/x/dup.txt", "b/nested.txt", "d/e/nested.txt"):
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(relative)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filename", ["dup.txt", "nested.txt"])
+async def test_duplicate_name_resolves_like_os_walk(docs, filename):
+    tool = ReadDocumentTool(docs)
+    expected = first_walk_match(tool.base_path, filename)
+
+    result = await tool.execute(filename)
+
+    assert result["content"] == expected.relative_to(tool.base_path).as_posix()
+
+
+def test_index_matches_os_walk_for_every_name(docs):
+    tool = ReadDocumentTool(docs)
+
+    tool._ensure_index()
+
+    assert tool._filename_index == {
+        name: first_walk_match(tool.base_path, name)
+        for name in ("dup.txt", "nested.txt")
+    }
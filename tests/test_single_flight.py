@@ -0,0 +1,123 @@
+"""
+Tests de SingleFlight: coalescer búsquedas concurrentes idénticas.
+
+Cubren que el backend se llama una sola vez por key concurrente, que cada
+caller recibe su propia copia del resultado y que un error sin nadie
+esperándolo no queda como "Future exception was never retrieved".
+"""
+
+import asyncio
+import gc
+
+import pytest
+
+from src.tools.single_flight import SingleFlight
+
+
+class FakeRetrieval:
+    """Backend de retrieval que cuenta llamadas y espera una señal para responder."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def retrieve(self, query, k, filter_metadata=None):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {"chunks": [{"content": query}], "method": "fake"}
+
+
+async def gather_released(backend, *calls):
+    """Lanza las llamadas, deja que todas se registren y libera el backend."""
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    await asyncio.sleep(0)
+    backend.release.set()
+    return await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_hit_backend_once():
+    backend = FakeRetrieval()
+    flight = SingleFlight()
+
+    first, second = await gather_released(
+        backend,
+        flight.run("q", lambda: backend.retrieve("q", 5)),
+        flight.run("q", lambda: backend.retrieve("q", 5)),
+    )
+
+    assert backend.calls == 1
+    assert first == second == {"chunks": [{"content": "q"}], "method": "fake"}
+
+
+@pytest.mark.asyncio
+async def test_each_caller_gets_its_own_chunks_list():
+    backend = FakeRetrieval()
+    flight = SingleFlight()
+
+    first, second = await gather_released(
+        backend,
+        flight.run("q", lambda: backend.retrieve("q", 5)),
+        flight.run("q", lambda: backend.retrieve("q", 5)),
+    )
+    first["chunks"].clear()
+
+    assert second["chunks"] == [{"content": "q"}]
+
+
+@pytest.mark.asyncio
+async def test_finished_call_is_not_reused():
+    backend = FakeRetrieval()
+    backend.release.set()
+    flight = SingleFlight()
+
+    await flight.run("q", lambda: backend.retrieve("q", 5))
+    await flight.run("q", lambda: backend.retrieve("q", 5))
+
+    assert backend.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_is_retrieved_when_every_caller_is_cancelled():
+    backend = FakeRetrieval(error=RuntimeError("backend caído"))
+    flight = SingleFlight()
+    loop = asyncio.get_running_loop()
+    reported = []
+    loop.set_exception_handler(lambda _, context: reported.append(context))
+
+    try:
+        caller = asyncio.ensure_future(flight.run("q", lambda: backend.retrieve("q", 5)))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+        backend.release.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        gc.collect()
+    finally:
+        loop.set_exception_handler(None)
+
+    assert backend.calls == 1
+    assert reported == []
+
+
+@pytest.mark.asyncio
+async def test_vector_tool_coalesces_identical_queries():
+    module = pytest.importorskip("src.tools.retrieval_vector_tool")
+    backend = FakeRetrieval()
+    tool = module.RetrievalVectorTool(backend)
+
+    first, second = await gather_released(
+        backend,
+        tool.execute("¿cómo me jubilo?", top_k=3),
+        tool.execute("¿cómo me jubilo?", top_k=3),
+    )
+
+    assert backend.calls == 1
+    assert first["query"] == second["query"] == "¿cómo me jubilo?"
+    assert first["chunks"] is not second["chunks"]
@@ -0,0 +1,224 @@
+"""
+Tests de SQLQueryTool.execute con un pool falso (sin base de datos).
+
+Cubren el tope de MAX_SQL_ROWS cuando la query trae su propio LIMIT: el
+resultado se corta y se marca truncated, en vez de quedar incompleto en
+silencio. También la parametrización de literales (_parameterize / _fetch):
+qué errores caen a la query original y cuáles se propagan.
+"""
+
+from contextlib import asynccontextmanager
+
+import asyncpg
+import pytest
+
+from src.agents.buscador.config import MAX_SQL_ROWS
+from src.tools.sql_query_tool import SQLQueryTool, _parameterize
+
+
+class FakeRecord(tuple):
+    """Como asyncpg.Record: itera valores y expone keys()."""
+
+    def __new__(cls, mapping):
+        record = super().__new__(cls, mapping.values())
+        record._keys = tuple(mapping)
+        return record
+
+    def keys(self):
+        return iter(self._keys)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def fetch(self, n):
+        batch, self._rows = self._rows[:n], self._rows[n:]
+        return batch
+
+
+class FakeStatement:
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def cursor(self, *params):
+        return FakeCursor(self._rows)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def prepare(self, query):
+        return FakeStatement(self._rows)
+
+    async def fetch(self, query, *params):
+        return self._rows[:MAX_SQL_ROWS]
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    def __init__(self, rows):
+        self._conn = FakeConnection(rows)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self._conn
+
+
+def make_dicts(n):
+    return [{"rut": f"{i}-9", "nombre": f"Afiliado {i}"} for i in range(n)]
+
+
+def make_rows(dicts):
+    return [FakeRecord(d) for d in dicts]
+
+
+@pytest.mark.asyncio
+async def test_caller_limit_above_cap_is_marked_truncated():
+    dicts = make_dicts(MAX_SQL_ROWS + 50)
+    tool = SQLQueryTool(FakePool(make_rows(dicts)))
+
+    result = await tool.execute("SELECT rut, nombre FROM afiliados LIMIT 500")
+
+    assert result["count"] == MAX_SQL_ROWS
+    assert result["truncated"] is True
+    assert result["results"] == dicts[:MAX_SQL_ROWS]
+
+
+@pytest.mark.asyncio
+async def test_caller_limit_within_cap_is_not_truncated():
+    dicts = make_dicts(MAX_SQL_ROWS)
+    tool = SQLQueryTool(FakePool(make_rows(dicts)))
+
+    result = await tool.execute("SELECT rut, nombre FROM afiliados LIMIT 500")
+
+    assert result["count"] == MAX_SQL_ROWS
+    assert result["truncated"] is False
+    assert result["results"] == dicts
+
+
+@pytest.mark.asyncio
+async def test_added_limit_is_not_truncated():
+    dicts = make_dicts(MAX_SQL_ROWS + 50)
+    tool = SQLQueryTool(FakePool(make_rows(dicts)))
+
+    result = await tool.execute("SELECT rut, nombre FROM afiliados")
+
+    assert result["query"].endswith(f"LIMIT {MAX_SQL_ROWS}")
+    assert result["truncated"] is False
+    assert result["results"] == dicts[:MAX_SQL_ROWS]
+
+
+class ScriptedConnection:
+    """Conexión que registra cada fetch y falla con los templates indicados."""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.calls = []
+
+    async def fetch(self, query, *params):
+        self.calls.append((query, params))
+        if query in self.failures:
+            raise self.failures[query]
+        return []
+
+
+def client_data_error():
+    """DataError como lo lanza asyncpg al codificar un parámetro (con causa)."""
+    error = asyncpg.DataError("invalid input for query argument $1")
+    error.__cause__ = TypeError("expected a datetime.date or datetime.datetime instance")
+    return error
+
+
+def test_parameterize_unescapes_doubled_quotes():
+    template, params = _parameterize(
+        "SELECT * FROM afiliados WHERE nombre = 'O''Higgins' AND rut = '1-9'"
+    )
+
+    assert template == "SELECT * FROM afiliados WHERE nombre = $1 AND rut = $2"
+    assert params == ["O'Higgins", "1-9"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_passes_literals_as_parameters():
+    tool = SQLQueryTool(FakePool([]))
+    conn = ScriptedConnection()
+
+    await tool._fetch(conn, "SELECT * FROM afiliados WHERE nombre = 'D''Arcy'")
+
+    assert conn.calls == [("SELECT * FROM afiliados WHERE nombre = $1", ("D'Arcy",))]
+
+
+@pytest.mark.asyncio
+async def test_fetch_does_not_rewrite_queries_with_dollar():
+    tool = SQLQueryTool(FakePool([]))
+    conn = ScriptedConnection()
+    query = "SELECT * FROM afiliados WHERE nombre = $$x$$ OR rut = '1-9'"
+
+    await tool._fetch(conn, query)
+
+    assert conn.calls == [(query, ())]
+
+
+@pytest.mark.asyncio
+async def test_client_data_error_falls_back_to_raw_query():
+    tool = SQLQueryTool(FakePool([]))
+    query = "SELECT * FROM aportes WHERE fecha > '2024-01-01'"
+    template = "SELECT * FROM aportes WHERE fecha > $1"
+    conn = ScriptedConnection({template: client_data_error()})
+
+    await tool._fetch(conn, query)
+
+    assert conn.calls == [(template, ("2024-01-01",)), (query, ())]
+    assert template in tool._raw_only
+
+    # El template recordado ya no se reintenta con parámetros
+    conn.calls.clear()
+    await tool._fetch(conn, query)
+    assert conn.calls == [(query, ())]
+
+
+@pytest.mark.asyncio
+async def test_server_data_error_is_raised():
+    tool = SQLQueryTool(FakePool([]))
+    template = "SELECT 1 / 0 FROM afiliados WHERE rut = $1"
+    conn = ScriptedConnection({template: asyncpg.DataError("division by zero")})
+
+    with pytest.raises(asyncpg.DataError):
+        await tool._fetch(conn, "SELECT 1 / 0 FROM afiliados WHERE rut = '1-9'")
+
+    assert len(conn.calls) == 1
+    assert template not in tool._raw_only
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [
+    asyncpg.PostgresSyntaxError("syntax error at or near \"$1\""),
+    asyncpg.exceptions.IndeterminateDatatypeError("could not determine data type of parameter $1"),
+])
+async def test_template_errors_fall_back_to_raw_query(error):
+    tool = SQLQueryTool(FakePool([]))
+    query = "SELECT * FROM afiliados WHERE rut = '1-9'"
+    template = "SELECT * FROM afiliados WHERE rut = $1"
+    conn = ScriptedConnection({template: error})
+
+    await tool._fetch(conn, query)
+
+    assert conn.calls == [(template, ("1-9",)), (query, ())]
+    assert template in tool._raw_only
+
+
+def test_raw_only_evicts_oldest_template():
+    tool = SQLQueryTool(FakePool([]))
+
+    for i in range(SQLQueryTool._RAW_ONLY_CACHE_SIZE + 1):
+        tool._mark_raw_only(f"template {i}")
+
+    assert len(tool._raw_only) == SQLQueryTool._RAW_ONLY_CACHE_SIZE
+    assert "template 0" not in tool._raw_only
+    assert "template 1" in tool._raw_only
+    assert f"template {SQLQueryTool._RAW_ONLY_CACHE_SIZE}" in tool._raw_only
@@ -0,0 +1,65 @@
+"""
+Tests de SQLValidator: la frontera de seguridad para el SQL que escribe el LLM.
+
+Cubren la semántica de _SQL_TOKEN_RE: keywords prohibidos como palabra
+completa (o como símbolo, para "--" y "/*"), tablas como identificador
+completo y SELECT como palabra completa, sin importar mayúsculas.
+"""
+
+import pytest
+
+from src.tools.sql_query_tool import SQLValidator
+
+
+@pytest.fixture
+def validator() -> SQLValidator:
+    return SQLValidator()
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM afiliados",
+    "   SELECT rut FROM afiliados WHERE rut = '12345678-9'",
+    "SELECT created_at, updated_at FROM afiliados",
+    "SELECT a.rut FROM afiliados a JOIN aportes p ON p.rut = a.rut",
+    "SELECT * FROM vista_resumen_afiliado",
+    "sElEcT * FrOm AfIlIaDoS",
+])
+def test_accepts_safe_select(validator, query):
+    assert validator.validate(query) == (True, "OK")
+
+
+@pytest.mark.parametrize("query, keyword", [
+    ("SELECT * FROM afiliados;DROP TABLE afiliados", "DROP"),
+    ("SELECT * FROM afiliados; drop table afiliados", "DROP"),
+    ("SELECT * FROM afiliados; DeLeTe FROM afiliados", "DELETE"),
+    ("SELECT * FROM afiliados/**/", "/*"),
+    ("SELECT * FROM afiliados/* comentario */", "/*"),
+    ("SELECT * FROM afiliados -- comentario", "--"),
+    ("SELECT * FROM afiliados--", "--"),
+    ("SELECT * FROM afiliados WHERE 1=1; EXECUTE sp", "EXECUTE"),
+])
+def test_rejects_forbidden_keywords(validator, query, keyword):
+    is_safe, error = validator.validate(query)
+    assert not is_safe
+    assert error == f"Keyword prohibido: {keyword}"
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM afiliados_backup",
+    "SELECT * FROM backup_afiliados",
+    "SELECT * FROM usuarios",
+])
+def test_rejects_tables_outside_whitelist(validator, query):
+    is_safe, error = validator.validate(query)
+    assert not is_safe
+    assert error.startswith("Tabla no permitida")
+
+
+@pytest.mark.parametrize("query", [
+    "SELECTX * FROM afiliados",
+    "DELETE FROM afiliados",
+    "WITH x AS (SELECT * FROM afiliados) SELECT * FROM x",
+    "",
+])
+def test_requires_select_as_whole_word(validator, query):
+    assert validator.validate(query) == (False, "Solo consultas SELECT permitidas")